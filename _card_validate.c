@@ -0,0 +1,78 @@
+/*
+ * Optional C helper for the card-number validator.
+ *
+ * is_ascii_digits(s) checks that a str is non-empty pure ASCII digits
+ * using a SWAR sweep: 8 bytes are loaded into a uint64 and tested
+ * lanewise for the range [0x30, 0x39] with the classic
+ * (w - 0x30..) | (w + 0x46..) high-bit trick, avoiding the per-char
+ * Unicode category lookup of str.isdigit().
+ *
+ * Built by the opt-in setup.py; models.py falls back to str.isdigit
+ * when the extension is absent.
+ */
+
+#include <Python.h>
+#include <stdint.h>
+#include <string.h>
+
+static int
+swar_is_ascii_digits(const char *p, size_t n)
+{
+    while (n >= 8) {
+        uint64_t w;
+        memcpy(&w, p, 8);
+        if (((w - 0x3030303030303030ULL) | (w + 0x4646464646464646ULL))
+            & 0x8080808080808080ULL)
+            return 0;
+        p += 8;
+        n -= 8;
+    }
+    while (n--) {
+        unsigned char c = (unsigned char)*p++;
+        if (c < '0' || c > '9')
+            return 0;
+    }
+    return 1;
+}
+
+static PyObject *
+is_ascii_digits(PyObject *self, PyObject *arg)
+{
+    if (!PyUnicode_Check(arg)) {
+        PyErr_SetString(PyExc_TypeError, "is_ascii_digits() expects a str");
+        return NULL;
+    }
+    /* Non-ASCII strings cannot be plain digit strings for our purposes,
+     * and the SWAR trick assumes bytes < 0x80. */
+    if (!PyUnicode_IS_ASCII(arg))
+        Py_RETURN_FALSE;
+
+    Py_ssize_t n = PyUnicode_GET_LENGTH(arg);
+    if (n == 0)
+        Py_RETURN_FALSE;
+
+    const char *s = (const char *)PyUnicode_1BYTE_DATA(arg);
+    if (swar_is_ascii_digits(s, (size_t)n))
+        Py_RETURN_TRUE;
+    Py_RETURN_FALSE;
+}
+
+static PyMethodDef card_validate_methods[] = {
+    {"is_ascii_digits", is_ascii_digits, METH_O,
+     "Return True if the string is non-empty and all ASCII digits."},
+    {NULL, NULL, 0, NULL},
+};
+
+static struct PyModuleDef card_validate_module = {
+    PyModuleDef_HEAD_INIT,
+    "_card_validate",
+    "SWAR ASCII-digit check for card-number validation.",
+    -1,
+    card_validate_methods,
+};
+
+PyMODINIT_FUNC
+PyInit__card_validate(void)
+{
+    return PyModule_Create(&card_validate_module);
+}
@@ -5,6 +5,7 @@ Demonstrates how to use the Azure AI agent with MCP tools.
 """
 
 import os
+import asyncio
 from dotenv import load_dotenv
 from azure_payment_agent import AzurePaymentAgent
 
@@ -38,7 +39,7 @@ def check_prerequisites():
     return True
 
 
-def example_tokenize_and_pay():
+async def example_tokenize_and_pay():
     """Example: Tokenize card and process payment"""
     print("\n" + "=" * 60)
     print("Example: Tokenize Card and Process Payment")
@@ -49,10 +50,11 @@ def example_tokenize_and_pay():
 
     try:
         agent = AzurePaymentAgent()
+        await agent.initialize()
 
         # Step 1: Tokenize
         print("\n📝 Step 1: Tokenizing card...")
-        response1 = agent.chat(
+        response1 = await agent.chat(
             "Tokenize this card: 4532015112830366, cardholder John Doe, "
             "expires 12/2025, cvv 123, email john@example.com, "
             "billing address 123 Main St, New York, NY, 10001"
@@ -61,7 +63,7 @@ def example_tokenize_and_pay():
 
         # Step 2: Process payment
         print("\n💳 Step 2: Processing payment...")
-        response2 = agent.chat(
+        response2 = await agent.chat(
             "Now process a payment of $99.99 for customer cust_john_123 "
             "with description 'Product purchase'"
         )
@@ -69,14 +71,14 @@ def example_tokenize_and_pay():
 
         # Step 3: View transactions
         print("\n📊 Step 3: Viewing transactions...")
-        response3 = agent.chat("Show me all transactions for customer cust_john_123")
+        response3 = await agent.chat("Show me all transactions for customer cust_john_123")
         print(f"Response: {response3}")
 
     except Exception as e:
         print(f"\n❌ Error: {e}")
 
 
-def example_natural_conversation():
+async def example_natural_conversation():
     """Example: Natural conversation with the agent"""
     print("\n" + "=" * 60)
     print("Example: Natural Conversation Flow")
@@ -87,6 +89,7 @@ def example_natural_conversation():
 
     try:
         agent = AzurePaymentAgent()
+        await agent.initialize()
 
         conversation = [
             "Hi, I need help processing a payment",
@@ -98,14 +101,14 @@ def example_natural_conversation():
 
         for i, message in enumerate(conversation, 1):
             print(f"\n🧑 User ({i}/{len(conversation)}): {message}")
-            response = agent.chat(message)
+            response = await agent.chat(message)
             print(f"🤖 Agent: {response}")
 
     except Exception as e:
         print(f"\n❌ Error: {e}")
 
 
-def example_error_scenarios():
+async def example_error_scenarios():
     """Example: Testing error handling"""
     print("\n" + "=" * 60)
     print("Example: Error Handling Scenarios")
@@ -116,25 +119,26 @@ def example_error_scenarios():
 
     try:
         agent = AzurePaymentAgent()
+        await agent.initialize()
 
         # Tokenize first
         print("\n📝 Tokenizing test card...")
-        agent.chat(
+        await agent.chat(
             "Tokenize card 378282246310005, Alice Test, exp 12/2025, cvv 1234, "
             "email alice@test.com, billing 111 Test St, Test City, TC, 00000"
         )
 
         # Test insufficient funds
         print("\n💳 Testing insufficient funds scenario ($0.01)...")
-        response = agent.chat("Process payment of $0.01 for customer cust_test_error")
+        response = await agent.chat("Process payment of $0.01 for customer cust_test_error")
         print(f"Response: {response}")
 
         # Test declined
         print("\n💳 Testing declined scenario ($0.02)...")
-        agent.chat(
+        await agent.chat(
             "Tokenize a new card: 4111111111111111, Test User, exp 03/2027, cvv 999, email test@test.com, billing 222 Test St, Test, TS, 11111"
         )
-        response = agent.chat(
+        response = await agent.chat(
             "Process payment of $0.02 for customer cust_test_declined"
         )
         print(f"Response: {response}")
@@ -143,7 +147,7 @@ def example_error_scenarios():
         print(f"\n❌ Error: {e}")
 
 
-def main():
+async def main():
     """Run all examples"""
     print("\n" + "=" * 60)
     print("  Azure Payment Agent - Example Usage")
@@ -156,15 +160,15 @@ def main():
 
     try:
         # Example 1
-        example_tokenize_and_pay()
-        input("\nPress Enter to continue to next example...")
+        await example_tokenize_and_pay()
+        await asyncio.to_thread(input, "\nPress Enter to continue to next example...")
 
         # Example 2
-        example_natural_conversation()
-        input("\nPress Enter to continue to next example...")
+        await example_natural_conversation()
+        await asyncio.to_thread(input, "\nPress Enter to continue to next example...")
 
         # Example 3
-        example_error_scenarios()
+        await example_error_scenarios()
 
         print("\n" + "=" * 60)
         print("  All Examples Completed!")
@@ -175,4 +179,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -6,21 +6,66 @@ the Payment MCP API as tools.
 """
 
 import os
+import re
 import json
+import asyncio
+import hashlib
+import logging
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+import fastjsonschema
 import httpx
+import orjson
 from dotenv import load_dotenv
 from azure.identity import DefaultAzureCredential
 from azure.ai.agents import AgentsClient
 
+from mcp_server import get_payment_tools, execute_payment_function
+
 # Load environment variables
 load_dotenv()
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
 # Configuration
 MCP_API_URL = os.getenv("MCP_API_URL", "http://localhost:8001")
 PROJECT_ENDPOINT = os.getenv("PROJECT_ENDPOINT")
 AGENT_NAME = os.getenv("AGENT_NAME", "payment-agent")
 MODEL_DEPLOYMENT_NAME = os.getenv("MODEL_DEPLOYMENT_NAME", "gpt-5.2-chat")
 
+# Agent instructions are static; build the string once per process
+_INSTRUCTIONS = """You are a helpful payment processing assistant. You have access to payment tools to:
+- Tokenize credit/debit cards for secure storage
+- Process payments using tokenized cards
+- Retrieve transaction details
+- Get customer transaction history
+- Process refunds
+- Get token information
+
+When users provide payment card information, always tokenize it first before processing payments.
+When the card details and the payment amount are both known up front, prefer the tokenize_and_charge tool, which does both in one call.
+Be helpful, accurate, and secure. Always confirm important actions before executing them.
+
+Important: When calling tools, extract all required parameters from the user's message.
+Tool definitions are abbreviated; call get_tool_schema with a tool name to see its full parameter schema before your first use of that tool."""
+
+
+@lru_cache(maxsize=1)
+def _credential() -> DefaultAzureCredential:
+    """Process-wide Azure credential; the chain is probed only once"""
+    return DefaultAzureCredential()
+
+
+@lru_cache(maxsize=1)
+def _agents_client() -> AgentsClient:
+    """Process-wide AgentsClient sharing one credential and HTTP pool"""
+    return AgentsClient(
+        endpoint=PROJECT_ENDPOINT,
+        credential=_credential(),
+    )
+
 
 class AzurePaymentAgent:
     """AI Agent using Azure AI Agents SDK with Payment MCP API tools"""
@@ -30,35 +75,143 @@ class AzurePaymentAgent:
         if not PROJECT_ENDPOINT:
             raise ValueError("PROJECT_ENDPOINT environment variable is required")
 
-        # Initialize Azure AI Agents Client
-        self.credential = DefaultAzureCredential()
-        self.agents_client = AgentsClient(
-            endpoint=PROJECT_ENDPOINT,
-            credential=self.credential,
+        # Shared Azure AI Agents Client (credential chain runs once per process)
+        self.credential = _credential()
+        self.agents_client = _agents_client()
+
+        # Async HTTP client for MCP API - pooled connections with keep-alive
+        # so concurrent tool calls share sockets instead of reconnecting
+        self.http_client = httpx.AsyncClient(
+            base_url=MCP_API_URL,
+            limits=httpx.Limits(
+                max_connections=50,
+                max_keepalive_connections=20,
+                keepalive_expiry=30.0,
+            ),
+            timeout=httpx.Timeout(connect=5.0, read=30.0, write=30.0, pool=5.0),
         )
-
-        # Initialize HTTP client for MCP API
-        self.http_client = httpx.Client()
         self.mcp_api_url = MCP_API_URL
 
-        # Load tools from MCP API
-        self.tools = self._load_mcp_tools()
+        # With no MCP_API_URL (or an inproc:// one) tool calls dispatch
+        # straight into mcp_server, skipping loopback HTTP entirely
+        self._in_process = not MCP_API_URL or MCP_API_URL.startswith("inproc://")
 
-        # Create agent with tools
-        self.agent = self._create_agent()
+        # Populated by initialize()
+        self.tools = ()
+        self._full_schemas = {}
+        self.agent = None
 
         # Thread will be created per conversation
         self.current_thread_id = None
 
+    async def initialize(self):
+        """Load MCP tools and create the Azure agent (async startup)"""
+        self.tools = await self._load_mcp_tools()
+
+        # Keep the full schemas local; the agent only sees minimal stubs and
+        # fetches a full schema on demand via the get_tool_schema tool
+        self._full_schemas = {
+            tool["function"]["name"]: tool["function"]["parameters"]
+            for tool in self.tools
+        }
+
+        # Keyword index over tool names/descriptions for search_tools, plus
+        # the set of tools the model has already discovered this session
+        self._descriptions = {
+            tool["function"]["name"]: tool["function"]["description"]
+            for tool in self.tools
+        }
+        self._vocab = {
+            name: set(re.findall(r"\w{3,}", f"{desc} {name}".lower()))
+            for name, desc in self._descriptions.items()
+        }
+        self._discovered = set()
+
+        # Compile each tool's input schema once; validating locally rejects
+        # malformed model arguments without burning an MCP round-trip
+        self._validators = {}
+        for name, schema in self._full_schemas.items():
+            try:
+                self._validators[name] = fastjsonschema.compile(schema)
+            except fastjsonschema.JsonSchemaDefinitionException as e:
+                print(f"⚠ Could not compile schema for {name}: {e}")
+
+        # Create agent with tools (SDK is sync, so run it off the event loop)
+        self.agent = await asyncio.to_thread(self._create_agent)
+
         print(f"✓ Azure Agent created: {self.agent.id}")
         print(f"✓ Loaded {len(self.tools)} tools from MCP API")
 
-    def _load_mcp_tools(self):
-        """Load tools from MCP API and convert to Azure format"""
+    async def aclose(self):
+        """Release the HTTP connection pool"""
+        await self.http_client.aclose()
+
+    def _tools_cache_path(self) -> Path:
+        """Path of the on-disk tool cache for the configured MCP API URL"""
+        url_hash = hashlib.md5(self.mcp_api_url.encode()).hexdigest()
+        return Path(f"~/.cache/checkoutmcp/tools-{url_hash}.json").expanduser()
+
+    def _read_tools_cache(self):
+        """Read the cached tool list, returning (etag, tools) or (None, None)"""
+        try:
+            with open(self._tools_cache_path()) as f:
+                cached = json.load(f)
+            return cached.get("etag"), cached.get("tools")
+        except (OSError, ValueError):
+            return None, None
+
+    def _write_tools_cache(self, etag, tools):
+        """Atomically persist the tool list so future startups skip discovery"""
+        cache_path = self._tools_cache_path()
         try:
-            response = self.http_client.get(f"{self.mcp_api_url}/mcp/tools/list")
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=cache_path.parent, suffix=".tmp"
+            )
+            with os.fdopen(fd, "w") as f:
+                json.dump({"etag": etag, "tools": tools}, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            # Cache is best-effort; discovery still worked
+            print(f"⚠ Could not write tool cache: {e}")
+
+    async def _load_mcp_tools(self):
+        """Load tools from MCP API and convert to Azure format
+
+        The translated tool list is cached on disk keyed by the MCP API URL.
+        A conditional request (If-None-Match) revalidates the cache so repeat
+        agent startups skip the full discovery round-trip.
+        """
+        # In-process mode reads the tool definitions straight from mcp_server
+        if self._in_process:
+            return tuple(
+                {
+                    "type": "function",
+                    "function": {
+                        "name": tool["function"]["name"],
+                        "description": tool["function"]["description"],
+                        "parameters": tool["function"]["parameters"],
+                    },
+                }
+                for tool in get_payment_tools()
+            )
+
+        cached_etag, cached_tools = self._read_tools_cache()
+
+        try:
+            headers = {}
+            if cached_etag and cached_tools is not None:
+                headers["If-None-Match"] = cached_etag
+
+            response = await self.http_client.get(
+                "/mcp/tools/list", headers=headers
+            )
+
+            if response.status_code == 304 and cached_tools is not None:
+                return tuple(cached_tools)
+
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             # Convert MCP tools to Azure function format
             azure_tools = []
@@ -74,64 +227,268 @@ class AzurePaymentAgent:
                     }
                 )
 
-            return azure_tools
+            self._write_tools_cache(response.headers.get("etag"), azure_tools)
+
+            return tuple(azure_tools)
         except Exception as e:
+            if cached_tools is not None:
+                print(f"⚠ MCP discovery failed ({e}), using cached tools")
+                return tuple(cached_tools)
             print(f"✗ Failed to load MCP tools: {e}")
-            return []
+            return ()
+
+    def _build_stub_tools(self):
+        """Build minimal tool stubs plus a get_tool_schema escape hatch
+
+        Injecting six full input schemas into every run wastes prompt tokens.
+        Each tool keeps its name and description but gets an open-ended
+        parameter stub; the model calls get_tool_schema(name) when it needs
+        the real schema, which is answered locally without an HTTP hop.
+        """
+        stub_schema = {"type": "object", "properties": {}, "additionalProperties": True}
+
+        stub_tools = []
+        for tool in self.tools:
+            stub_tools.append(
+                {
+                    "type": "function",
+                    "function": {
+                        "name": tool["function"]["name"],
+                        "description": tool["function"]["description"],
+                        "parameters": stub_schema,
+                    },
+                }
+            )
+
+        stub_tools.append(
+            {
+                "type": "function",
+                "function": {
+                    "name": "search_tools",
+                    "description": "Search the available payment tools by keyword. Returns the best-matching tool names and descriptions. Use this to find the right tool before calling it.",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "query": {
+                                "type": "string",
+                                "description": "Keywords describing the task, e.g. 'refund a charge'",
+                            },
+                        },
+                        "required": ["query"],
+                    },
+                },
+            }
+        )
+
+        stub_tools.append(
+            {
+                "type": "function",
+                "function": {
+                    "name": "get_tool_schema",
+                    "description": "Get the full JSON input schema for a payment tool. Call this before using a tool if you are unsure which parameters it requires.",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "name": {
+                                "type": "string",
+                                "description": "Name of the tool to describe",
+                            },
+                        },
+                        "required": ["name"],
+                    },
+                },
+            }
+        )
+
+        return stub_tools
 
     def _create_agent(self):
         """Create Azure AI agent with MCP tools"""
-        print(f"Debug: Creating agent with {len(self.tools)} tools")
-        print(
-            f"Debug: First tool sample: {self.tools[0] if self.tools else 'No tools'}"
+        logger.debug("Creating agent with %d tools", len(self.tools))
+        logger.debug(
+            "First tool sample: %r", self.tools[0] if self.tools else "No tools"
         )
 
         agent = self.agents_client.create_agent(
             model=MODEL_DEPLOYMENT_NAME,
             name=AGENT_NAME,
-            instructions="""You are a helpful payment processing assistant. You have access to payment tools to:
-- Tokenize credit/debit cards for secure storage
-- Process payments using tokenized cards
-- Retrieve transaction details
-- Get customer transaction history
-- Process refunds
-- Get token information
-
-When users provide payment card information, always tokenize it first before processing payments.
-Be helpful, accurate, and secure. Always confirm important actions before executing them.
-
-Important: When calling tools, extract all required parameters from the user's message.""",
-            tools=self.tools,
+            instructions=_INSTRUCTIONS,
+            tools=self._build_stub_tools(),
         )
 
-        print(f"Debug: Agent created with ID: {agent.id}")
-        print(f"Debug: Agent tools: {getattr(agent, 'tools', 'No tools attribute')}")
+        logger.debug("Agent created with ID: %s", agent.id)
+        logger.debug("Agent tools: %r", getattr(agent, "tools", "No tools attribute"))
 
         return agent
 
-    def _execute_mcp_tool(self, tool_name: str, arguments: dict) -> str:
+    def _search_tools(self, query: str) -> str:
+        """Score tools by keyword overlap with the query and return the top 5
+
+        A tool-name hit counts double a description hit. Matched tools are
+        marked discovered so later turns can assume the model knows them.
+        """
+        query_words = set(re.findall(r"\w{3,}", query.lower()))
+
+        scored = []
+        for name, vocab in self._vocab.items():
+            score = 2 * sum(1 for w in query_words if w in name) + sum(
+                1 for w in query_words if w in vocab
+            )
+            if score > 0:
+                scored.append((score, name))
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        matches = [name for _, name in scored[:5]]
+        self._discovered.update(matches)
+
+        return json.dumps(
+            [
+                {"name": name, "description": self._descriptions[name]}
+                for name in matches
+            ]
+        )
+
+    async def _execute_mcp_tool(self, tool_name: str, arguments: dict) -> str:
         """Execute a tool via MCP API"""
+        # search_tools is answered locally from the keyword index
+        if tool_name == "search_tools":
+            return self._search_tools(arguments.get("query", ""))
+
+        # get_tool_schema is answered locally from the cached full schemas
+        if tool_name == "get_tool_schema":
+            schema = self._full_schemas.get(arguments.get("name"))
+            if schema is None:
+                return json.dumps({"error": f"Unknown tool: {arguments.get('name')}"})
+            return json.dumps(schema)
+
+        # Validate arguments locally before spending a round-trip on them
+        validator = self._validators.get(tool_name)
+        if validator is not None:
+            try:
+                validator(arguments)
+            except fastjsonschema.JsonSchemaValueException as e:
+                return json.dumps({"error": f"invalid args: {e.message}"})
+
+        # Same-process dispatch: no TCP, no HTTP framing, no JSON re-decode
+        if self._in_process:
+            return await asyncio.to_thread(
+                execute_payment_function, tool_name, arguments
+            )
+
         try:
-            response = self.http_client.post(
-                f"{self.mcp_api_url}/mcp/tools/call",
+            response = await self.http_client.post(
+                "/mcp/tools/call",
                 json={"name": tool_name, "arguments": arguments},
             )
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             # Extract text from content
             if "content" in data and len(data["content"]) > 0:
                 return data["content"][0]["text"]
-            return json.dumps(data)
+            return orjson.dumps(data).decode()
         except Exception as e:
             return json.dumps({"error": str(e)})
 
-    def chat(self, message: str) -> str:
+    async def _gather_tool_outputs(self, tool_calls):
+        """Execute required tool calls concurrently and build their outputs
+
+        Independent MCP calls in one turn go out via asyncio.gather, so a
+        multi-tool turn costs roughly one round-trip instead of their sum.
+        """
+        results = await asyncio.gather(
+            *(
+                self._execute_mcp_tool(
+                    tc.function.name, json.loads(tc.function.arguments)
+                )
+                for tc in tool_calls
+            )
+        )
+
+        return [
+            {"tool_call_id": tc.id, "output": output}
+            for tc, output in zip(tool_calls, results)
+        ]
+
+    async def _submit_tool_outputs(self, run):
+        """Execute the run's required tool calls and submit their outputs"""
+        tool_outputs = await self._gather_tool_outputs(
+            run.required_action.submit_tool_outputs.tool_calls
+        )
+
+        return await asyncio.to_thread(
+            self.agents_client.runs.submit_tool_outputs_and_process,
+            thread_id=run.thread_id,
+            run_id=run.id,
+            tool_outputs=tool_outputs,
+        )
+
+    async def chat_stream(self, message: str):
+        """Send a message and yield response text deltas as they arrive
+
+        Streams the run instead of waiting for completion and re-fetching
+        messages, so the first token reaches the caller after one delta
+        round-trip instead of run-wait plus a separate GET.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+
+        def worker():
+            try:
+                thread = self.agents_client.threads.create(
+                    messages=[{"role": "user", "content": message}]
+                )
+                self.current_thread_id = thread.id
+
+                with self.agents_client.runs.stream(
+                    thread_id=thread.id, agent_id=self.agent.id
+                ) as stream:
+                    for event_type, event_data, _ in stream:
+                        if event_type == "thread.message.delta":
+                            text = getattr(event_data, "text", "")
+                            if text:
+                                loop.call_soon_threadsafe(queue.put_nowait, text)
+                        elif (
+                            event_type == "thread.run.requires_action"
+                        ):
+                            # Run the async tool calls on the event loop,
+                            # then continue the same stream with the outputs
+                            tool_outputs = asyncio.run_coroutine_threadsafe(
+                                self._gather_tool_outputs(
+                                    event_data.required_action.submit_tool_outputs.tool_calls
+                                ),
+                                loop,
+                            ).result()
+                            self.agents_client.runs.submit_tool_outputs_stream(
+                                thread_id=event_data.thread_id,
+                                run_id=event_data.id,
+                                tool_outputs=tool_outputs,
+                                event_handler=stream,
+                            )
+            except Exception as e:
+                loop.call_soon_threadsafe(
+                    queue.put_nowait, f"Error: {str(e)}"
+                )
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+
+        stream_task = asyncio.create_task(asyncio.to_thread(worker))
+
+        while True:
+            delta = await queue.get()
+            if delta is None:
+                break
+            yield delta
+
+        await stream_task
+
+    async def chat(self, message: str) -> str:
         """Send a message and get response from the agent"""
         try:
             # Create thread and process run with message
-            print(f"Debug: Creating thread and run...")
-            run = self.agents_client.create_thread_and_process_run(
+            logger.debug("Creating thread and run...")
+            run = await asyncio.to_thread(
+                self.agents_client.create_thread_and_process_run,
                 agent_id=self.agent.id,
                 thread={"messages": [{"role": "user", "content": message}]},
             )
@@ -139,32 +496,37 @@ Important: When calling tools, extract all required parameters from the user's m
             # Save thread ID for this conversation
             self.current_thread_id = run.thread_id
 
-            # Debug: Print run details
-            print(f"Debug: Run ID: {run.id}")
-            print(f"Debug: Run status: {run.status}")
-            print(f"Debug: Run model: {getattr(run, 'model', 'No model')}")
-            print(f"Debug: Run agent_id: {run.agent_id}")
+            # Function tools surface as requires_action; execute them and
+            # let the run continue until it reaches a terminal state
+            while run.status == "requires_action":
+                run = await self._submit_tool_outputs(run)
+
+            logger.debug("Run ID: %s", run.id)
+            logger.debug("Run status: %s", run.status)
+            logger.debug("Run model: %s", getattr(run, "model", "No model"))
+            logger.debug("Run agent_id: %s", run.agent_id)
 
             # Check if there are any errors
             if hasattr(run, "last_error") and run.last_error:
-                print(f"Debug: Run error: {run.last_error}")
+                logger.debug("Run error: %s", run.last_error)
 
             if hasattr(run, "incomplete_details") and run.incomplete_details:
-                print(f"Debug: Incomplete details: {run.incomplete_details}")
+                logger.debug("Incomplete details: %s", run.incomplete_details)
 
             # Check usage/token info
             if hasattr(run, "usage") and run.usage:
-                print(f"Debug: Run usage: {run.usage}")
+                logger.debug("Run usage: %s", run.usage)
 
-            # Print ALL run attributes to see what we're missing
-            all_attrs = {k: v for k, v in run.items() if not k.startswith("_")}
-            print(f"Debug: All run data: {str(all_attrs)[:500]}")
+            # Dump all run attributes only when debug logging is on; the
+            # dict materialization is not free on the hot path
+            if logger.isEnabledFor(logging.DEBUG):
+                all_attrs = {k: v for k, v in run.items() if not k.startswith("_")}
+                logger.debug("All run data: %s", str(all_attrs)[:500])
 
             # Get messages from the thread after run completes
             if run.status == "completed":
                 # Use REST API to get messages
                 from azure.core.rest import HttpRequest
-                import time
 
                 # Get API version from SDK config
                 api_version = getattr(
@@ -175,29 +537,38 @@ Important: When calling tools, extract all required parameters from the user's m
                 base_url = self.agents_client._config.endpoint.rstrip("/")
                 messages_url = f"{base_url}/threads/{run.thread_id}/messages?api-version={api_version}"
 
-                # Wait a bit before fetching messages
-                time.sleep(1)
-
                 request = HttpRequest(method="GET", url=messages_url)
 
-                response = self.agents_client.send_request(request)
-
-                if response.status_code == 200:
-                    messages_data = response.json()
-
-                    print(
-                        f"Debug: Found {len(messages_data.get('data', []))} total messages"
+                # The run is already terminal, so messages are usually
+                # available immediately; retry with exponential backoff
+                # (10ms -> 500ms cap, ~3s budget) only if they are not
+                delay = 0.01
+                deadline = asyncio.get_event_loop().time() + 3.0
+                while True:
+                    response = await asyncio.to_thread(
+                        self.agents_client.send_request, request
                     )
 
-                    # Print all messages for debugging
-                    for idx, msg in enumerate(messages_data.get("data", [])):
-                        print(
-                            f"Debug: Message {idx}: role={msg.get('role')}, content_count={len(msg.get('content', []))}"
+                    if response.status_code == 200:
+                        messages_data = response.json()
+
+                        logger.debug(
+                            "Found %d total messages",
+                            len(messages_data.get("data", [])),
                         )
 
-                    # Find the most recent assistant message
-                    if "data" in messages_data and messages_data["data"]:
-                        for msg in messages_data["data"]:
+                        # Log all messages for debugging
+                        if logger.isEnabledFor(logging.DEBUG):
+                            for idx, msg in enumerate(messages_data.get("data", [])):
+                                logger.debug(
+                                    "Message %d: role=%s, content_count=%d",
+                                    idx,
+                                    msg.get("role"),
+                                    len(msg.get("content", [])),
+                                )
+
+                        # Find the most recent assistant message
+                        for msg in messages_data.get("data", []):
                             if msg.get("role") == "assistant":
                                 # Extract text content
                                 for content in msg.get("content", []):
@@ -208,14 +579,18 @@ Important: When calling tools, extract all required parameters from the user's m
                                         if text_value:
                                             return text_value
 
+                    if asyncio.get_event_loop().time() >= deadline:
+                        break
+
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 0.5)
+
                 return "No response from assistant"
 
             return f"Run status: {run.status}"
 
         except Exception as e:
-            import traceback
-
-            print(f"Debug: Exception traceback:\n{traceback.format_exc()}")
+            logger.debug("Exception in chat()", exc_info=True)
             return f"Error: {str(e)}"
 
     def reset_thread(self):
@@ -224,7 +599,7 @@ Important: When calling tools, extract all required parameters from the user's m
         print("✓ Conversation reset")
 
 
-def main():
+async def main():
     """Interactive Azure agent demo"""
     print("\n" + "=" * 60)
     print("  Azure Payment Agent - AI Assistant with MCP Tools")
@@ -260,11 +635,12 @@ def main():
     try:
         # Initialize agent
         agent = AzurePaymentAgent()
+        await agent.initialize()
 
         # Conversation loop
         while True:
             try:
-                user_input = input("\n🧑 You: ").strip()
+                user_input = (await asyncio.to_thread(input, "\n🧑 You: ")).strip()
 
                 if not user_input:
                     continue
@@ -287,10 +663,11 @@ def main():
                     print("  • Refund transaction txn_abc123")
                     continue
 
-                # Get agent response
+                # Get agent response, printing deltas as they stream in
                 print("\n🤖 Agent: ", end="", flush=True)
-                response = agent.chat(user_input)
-                print(response)
+                async for delta in agent.chat_stream(user_input):
+                    print(delta, end="", flush=True)
+                print()
 
             except KeyboardInterrupt:
                 print("\n\n👋 Goodbye!\n")
@@ -298,9 +675,11 @@ def main():
             except Exception as e:
                 print(f"\n❌ Error: {e}\n")
 
+        await agent.aclose()
+
     except Exception as e:
         print(f"\n❌ Failed to initialize agent: {e}\n")
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -6,15 +6,42 @@ function calling to process payments conversationally.
 """
 
 import os
-import json
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 from mcp_server import get_payment_tools, execute_payment_function
 
 # Initialize OpenAI client
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-# Get payment tools
-tools = get_payment_tools()
+# Get payment tools once at import; the tuple is shared across every
+# completion call so the SDK serializes the same objects each time
+tools = tuple(get_payment_tools())
+
+
+# How many recent turns keep their tool results when pruning history
+_HISTORY_KEEP_TURNS = 4
+
+
+def _prune_history(conversation_history: list) -> list:
+    """Build the message list actually sent to the model
+
+    Tool results older than the last few turns rarely influence the next
+    reply but grow the prompt O(N) per turn. Stub their content out of
+    the outbound copy (the full history stays intact locally). The tool
+    messages themselves must stay: the API rejects a history where an
+    assistant tool_calls message has no matching tool response.
+    """
+    cutoff = len(conversation_history) - 2 * _HISTORY_KEEP_TURNS
+
+    pruned = []
+    for i, message in enumerate(conversation_history):
+        role = message["role"] if isinstance(message, dict) else message.role
+        if i < cutoff and role == "tool":
+            pruned.append({**message, "content": "…(tool result omitted)…"})
+        else:
+            pruned.append(message)
+
+    return pruned
 
 
 def run_agent_conversation(user_message: str, conversation_history: list = None):
@@ -34,9 +61,10 @@ def run_agent_conversation(user_message: str, conversation_history: list = None)
     # Call OpenAI with function calling
     response = client.chat.completions.create(
         model="gpt-4",
-        messages=conversation_history,
+        messages=_prune_history(conversation_history),
         tools=tools,
         tool_choice="auto",
+        parallel_tool_calls=True,
     )
 
     response_message = response.choices[0].message
@@ -48,15 +76,22 @@ def run_agent_conversation(user_message: str, conversation_history: list = None)
     # Handle tool calls if any
     if tool_calls:
         for tool_call in tool_calls:
-            function_name = tool_call.function.name
-            function_args = tool_call.function.arguments
-
-            print(f"\n🔧 Calling function: {function_name}")
-            print(f"Arguments: {function_args}")
-
-            # Execute the payment function
-            function_response = execute_payment_function(function_name, function_args)
+            print(f"\n🔧 Calling function: {tool_call.function.name}")
+            print(f"Arguments: {tool_call.function.arguments}")
+
+        # Each call is independent I/O against the payment API, so run them
+        # concurrently and collect responses in the original order
+        with ThreadPoolExecutor(max_workers=min(8, len(tool_calls))) as executor:
+            responses = list(
+                executor.map(
+                    lambda tc: execute_payment_function(
+                        tc.function.name, tc.function.arguments
+                    ),
+                    tool_calls,
+                )
+            )
 
+        for tool_call, function_response in zip(tool_calls, responses):
             print(f"Response: {function_response}")
 
             # Add function response to conversation
@@ -64,18 +99,27 @@ def run_agent_conversation(user_message: str, conversation_history: list = None)
                 {
                     "tool_call_id": tool_call.id,
                     "role": "tool",
-                    "name": function_name,
+                    "name": tool_call.function.name,
                     "content": function_response,
                 }
             )
 
-        # Get final response from the model
+        # Get the follow-up response as a stream so the first tokens arrive
+        # while the model is still generating, instead of waiting for the
+        # whole completion to buffer
         second_response = client.chat.completions.create(
             model="gpt-4",
-            messages=conversation_history,
+            messages=_prune_history(conversation_history),
+            stream=True,
         )
 
-        final_message = second_response.choices[0].message.content
+        chunks = []
+        for chunk in second_response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                chunks.append(delta)
+
+        final_message = "".join(chunks)
         conversation_history.append({"role": "assistant", "content": final_message})
 
         return final_message, conversation_history
@@ -1,11 +1,21 @@
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from datetime import datetime, timezone
+import asyncio
+import os
 import uvicorn
 from typing import Optional
 
-from models import TokenizeRequest, TokenizeResponse, PaymentRequest, PaymentResponse
+from models import (
+    BatchSimulationRequest,
+    TokenizeRequest,
+    TokenizeResponse,
+    PaymentRequest,
+    PaymentResponse,
+    TokenizeAndPayRequest,
+    TokenizeAndPayResponse,
+)
 from tokenizer import PaymentTokenizer
 from payment_processor import PaymentProcessor
 
@@ -16,6 +26,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -32,6 +43,51 @@ tokenizer = PaymentTokenizer()
 processor = PaymentProcessor()
 
 
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# Optional persistence: when set, tokens survive process restarts via a
+# pickle snapshot written on shutdown and reloaded on startup
+TOKEN_SNAPSHOT_PATH = os.getenv("TOKEN_SNAPSHOT_PATH")
+
+
+@app.on_event("startup")
+async def _load_token_snapshot():
+    if TOKEN_SNAPSHOT_PATH:
+        restored = tokenizer.load_snapshot(TOKEN_SNAPSHOT_PATH)
+        if restored:
+            print(f"Restored {restored} tokens from {TOKEN_SNAPSHOT_PATH}")
+
+
+@app.on_event("shutdown")
+async def _save_token_snapshot():
+    if TOKEN_SNAPSHOT_PATH:
+        tokenizer.snapshot(TOKEN_SNAPSHOT_PATH)
+
+
+@app.on_event("startup")
+async def _start_clock():
+    """Refresh a coarse cached timestamp once per second
+
+    Endpoints that only need second-level precision (health checks) read
+    app.state.now_iso instead of formatting a fresh datetime per request.
+    """
+
+    async def _tick():
+        while True:
+            app.state.now_iso = _utc_now_iso()
+            await asyncio.sleep(1)
+
+    app.state.now_iso = _utc_now_iso()
+    app.state.clock_task = asyncio.create_task(_tick())
+
+
+@app.on_event("shutdown")
+async def _stop_clock():
+    app.state.clock_task.cancel()
+
+
 @app.get("/")
 def read_root():
     """Root endpoint with API information"""
@@ -42,6 +98,7 @@ def read_root():
         "endpoints": {
             "tokenize": "/api/v1/tokenize",
             "process_payment": "/api/v1/payments",
+            "tokenize_and_pay": "/api/v1/tokenize-and-pay",
             "get_transaction": "/api/v1/transactions/{transaction_id}",
             "refund": "/api/v1/transactions/{transaction_id}/refund",
             "docs": "/docs",
@@ -52,7 +109,10 @@ def read_root():
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat()}
+    # Coarse cached timestamp; falls back to a direct read if the clock
+    # task has not started (e.g. bare TestClient without lifespan)
+    timestamp = getattr(app.state, "now_iso", None) or _utc_now_iso()
+    return {"status": "healthy", "timestamp": timestamp}
 
 
 @app.post(
@@ -87,8 +147,8 @@ async def tokenize_payment(request: TokenizeRequest):
             cvv=request.card.cvv,
         )
 
-        # Prepare response
-        response = TokenizeResponse(
+        # Fields come from the tokenizer, not the wire; skip validation
+        response = TokenizeResponse.model_construct(
             token=token_info["token"],
             last_four_digits=token_info["last_four_digits"],
             card_type=token_info["card_type"],
@@ -149,8 +209,8 @@ async def process_payment(request: PaymentRequest):
             token_data=token_data,
         )
 
-        # Prepare response
-        response = PaymentResponse(
+        # Fields come from the processor, not the wire; skip validation
+        response = PaymentResponse.model_construct(
             transaction_id=transaction["transaction_id"],
             status=transaction["status"],
             amount=transaction["amount"],
@@ -172,6 +232,93 @@ async def process_payment(request: PaymentRequest):
         )
 
 
+@app.post(
+    "/api/v1/tokenize-and-pay",
+    response_model=TokenizeAndPayResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def tokenize_and_pay(request: TokenizeAndPayRequest):
+    """
+    Tokenize a card and process a payment in one call
+
+    Fuses the two most common steps of the checkout flow so agents and
+    clients spend one round-trip instead of two. Behaves exactly like
+    calling /api/v1/tokenize followed by /api/v1/payments with the new
+    token; both partial results are returned.
+    """
+    try:
+        # Generate customer ID if not provided
+        customer_id = (
+            request.customer.customer_id or f"cust_{datetime.now(timezone.utc).timestamp()}"
+        )
+
+        # Tokenize the card
+        token_info = tokenizer.tokenize_card(
+            card_number=request.card.card_number,
+            card_holder=request.card.card_holder,
+            expiry_month=request.card.expiry_month,
+            expiry_year=request.card.expiry_year,
+            cvv=request.card.cvv,
+        )
+
+        tokenization = TokenizeResponse.model_construct(
+            token=token_info["token"],
+            last_four_digits=token_info["last_four_digits"],
+            card_type=token_info["card_type"],
+            expires_at=token_info["expires_at"],
+            customer_id=customer_id,
+            created_at=datetime.now(timezone.utc).isoformat(),
+        )
+
+        # Process payment with the fresh token
+        token_data = tokenizer.validate_token(token_info["token"])
+
+        transaction = processor.process_payment(
+            token=token_info["token"],
+            amount=request.amount,
+            currency=request.currency,
+            customer_id=customer_id,
+            description=request.description,
+            token_data=token_data,
+        )
+
+        payment = PaymentResponse.model_construct(
+            transaction_id=transaction["transaction_id"],
+            status=transaction["status"],
+            amount=transaction["amount"],
+            currency=transaction["currency"],
+            token=token_info["token"],
+            customer_id=transaction["customer_id"],
+            message=transaction["message"],
+            processed_at=transaction["processed_at"],
+        )
+
+        return TokenizeAndPayResponse.model_construct(
+            tokenization=tokenization, payment=payment
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tokenize-and-pay failed: {str(e)}",
+        )
+
+
+@app.post("/api/v1/payments/simulate-batch")
+async def simulate_payments_batch(request: BatchSimulationRequest):
+    """
+    Simulate processing outcomes for a batch of amounts
+
+    Load-testing helper: returns one status per amount using the same
+    special-amount rules as /api/v1/payments, computed in a single
+    vectorized pass and without creating transaction records.
+    """
+    statuses = processor.simulate_processing_batch(request.amounts)
+    return {"count": len(statuses), "statuses": statuses}
+
+
 @app.get("/api/v1/transactions/{transaction_id}")
 async def get_transaction(transaction_id: str):
     """
@@ -188,17 +335,29 @@ async def get_transaction(transaction_id: str):
 
 
 @app.get("/api/v1/customers/{customer_id}/transactions")
-async def get_customer_transactions(customer_id: str):
+async def get_customer_transactions(customer_id: str, request: Request):
     """
     Get all transactions for a specific customer
+
+    The response carries a weak ETag derived from the customer's write
+    counter; clients that revalidate with If-None-Match get a 304 and skip
+    the transaction-list serialization entirely when nothing changed.
     """
+    etag = f'W/"{customer_id}-{processor.get_customer_version(customer_id)}"'
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED)
+
     transactions = processor.get_customer_transactions(customer_id)
 
-    return {
-        "customer_id": customer_id,
-        "transaction_count": len(transactions),
-        "transactions": transactions,
-    }
+    return ORJSONResponse(
+        content={
+            "customer_id": customer_id,
+            "transaction_count": len(transactions),
+            "transactions": transactions,
+        },
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
 
 
 @app.post("/api/v1/transactions/{transaction_id}/refund")
@@ -249,4 +408,21 @@ async def get_token_info(token: str):
 
 if __name__ == "__main__":
     # Run the server
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, log_level="info")
+    if os.getenv("ENV") == "prod":
+        # Production: uvloop event loop + httptools parser, one worker per
+        # core. Note: tokens and transactions live in process memory, so
+        # each worker has its own state; move to a shared store before
+        # relying on cross-worker consistency.
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            loop="uvloop",
+            http="httptools",
+            workers=int(os.getenv("WORKERS", os.cpu_count())),
+            log_level="info",
+        )
+    else:
+        uvicorn.run(
+            "main:app", host="0.0.0.0", port=8000, reload=True, log_level="info"
+        )
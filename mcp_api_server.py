@@ -6,16 +6,23 @@ allowing you to use the MCP tools via HTTP requests instead of stdio.
 Also supports MCP protocol with SSE for Azure AI Foundry integration.
 """
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Any, Dict, List, Optional
 from datetime import datetime
-import json
 import asyncio
+import hashlib
+import os
 
-from mcp_server import PaymentMCPServer, get_payment_tools, execute_payment_function
+import orjson
+
+from mcp_server import (
+    MCP_TOOLS,
+    MCP_TOOLS_BYTES,
+    execute_payment_function_native,
+    payment_server,
+)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -24,19 +31,64 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
 )
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Minimal CORS handling: traffic is server-to-server (Azure AI Foundry,
+# stdio clients), so full CORSMiddleware header parsing on every request
+# is wasted work. Answer preflights directly and pass everything else
+# through untouched.
+_PREFLIGHT_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-methods", b"*"),
+    (b"access-control-allow-headers", b"*"),
+]
+
+
+class _PreflightMiddleware:
+    """Pure-ASGI fast path for OPTIONS preflight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "OPTIONS":
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 204,
+                    "headers": _PREFLIGHT_HEADERS,
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(_PreflightMiddleware)
+
+@app.on_event("startup")
+async def _start_clock():
+    """Refresh a coarse cached timestamp once per second
+
+    The health endpoint only needs second-level precision, so it reads
+    app.state.now_iso instead of formatting a fresh datetime per request.
+    """
 
-# Initialize MCP server
-payment_mcp = PaymentMCPServer()
+    async def _tick():
+        while True:
+            app.state.now_iso = datetime.utcnow().isoformat()
+            await asyncio.sleep(1)
+
+    app.state.now_iso = datetime.utcnow().isoformat()
+    app.state.clock_task = asyncio.create_task(_tick())
+
+
+@app.on_event("shutdown")
+async def _close_mcp_client():
+    """Release the shared HTTP connection pool on shutdown."""
+    app.state.clock_task.cancel()
+    await payment_server.aclose()
 
 
 # Request/Response Models
@@ -69,6 +121,14 @@ class MCPToolCallRequest(BaseModel):
     arguments: Dict[str, Any] = Field(..., description="Tool arguments")
 
 
+class MCPBatchCallRequest(BaseModel):
+    """MCP batch tool call request"""
+
+    calls: List[MCPToolCallRequest] = Field(
+        ..., description="Tool calls to execute concurrently"
+    )
+
+
 class MCPToolCallResponse(BaseModel):
     """MCP tool call response"""
 
@@ -103,18 +163,33 @@ def read_root():
     }
 
 
-@app.get("/health", response_model=HealthResponse)
+@app.get("/health")
 def health_check():
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
-        "mcp_server": "running",
-        "payment_api": "connected",
+    # Coarse cached timestamp; falls back to a direct read if the clock
+    # task has not started (e.g. bare TestClient without lifespan)
+    timestamp = getattr(app.state, "now_iso", None) or datetime.utcnow().isoformat()
+    return ORJSONResponse(
+        {
+            "status": "healthy",
+            "timestamp": timestamp,
+            "mcp_server": "running",
+            "payment_api": "connected",
+        }
+    )
+
+
+# Initialize response never changes; serialized once at import
+_INIT_BYTES = orjson.dumps(
+    {
+        "protocolVersion": "0.1.0",
+        "serverInfo": {"name": "payment-mcp-server", "version": "1.0.0"},
+        "capabilities": {"tools": {}},
     }
+)
 
 
-@app.post("/mcp/initialize", response_model=MCPInitializeResponse)
+@app.post("/mcp/initialize")
 def mcp_initialize():
     """
     MCP Initialize endpoint
@@ -122,39 +197,35 @@ def mcp_initialize():
     Mimics the MCP protocol initialize method.
     Returns server capabilities and information.
     """
-    return {
-        "protocolVersion": "0.1.0",
-        "serverInfo": {"name": "payment-mcp-server", "version": "1.0.0"},
-        "capabilities": {"tools": {}},
-    }
+    return Response(content=_INIT_BYTES, media_type="application/json")
+
 
+# Stable validator for the tool list; it only changes when the tool
+# definitions do, so clients revalidate with If-None-Match and skip the
+# payload on a match
+_TOOLS_ETAG = f'"{hashlib.md5(MCP_TOOLS_BYTES).hexdigest()}"'
 
-@app.get("/mcp/tools/list", response_model=MCPToolsListResponse)
-def mcp_list_tools():
+
+@app.get("/mcp/tools/list")
+def mcp_list_tools(request: Request):
     """
     MCP List Tools endpoint
 
-    Returns all available MCP tools with their schemas.
+    Returns all available MCP tools with their schemas. The payload is
+    serialized once at import time and served as-is, with an ETag so
+    agents that cached the list get a bodyless 304 on restart.
     """
-    tools = get_payment_tools()
-
-    # Convert to MCP tool format
-    mcp_tools = []
-    for tool in tools:
-        func = tool["function"]
-        mcp_tools.append(
-            {
-                "name": func["name"],
-                "description": func["description"],
-                "inputSchema": func["parameters"],
-            }
-        )
-
-    return {"tools": mcp_tools}
+    if request.headers.get("if-none-match") == _TOOLS_ETAG:
+        return Response(status_code=304, headers={"ETag": _TOOLS_ETAG})
+    return Response(
+        content=MCP_TOOLS_BYTES,
+        media_type="application/json",
+        headers={"ETag": _TOOLS_ETAG},
+    )
 
 
-@app.post("/mcp/tools/call", response_model=MCPToolCallResponse)
-def mcp_call_tool(request: MCPToolCallRequest):
+@app.post("/mcp/tools/call")
+async def mcp_call_tool(request: MCPToolCallRequest):
     """
     MCP Call Tool endpoint
 
@@ -170,16 +241,57 @@ def mcp_call_tool(request: MCPToolCallRequest):
     """
     try:
         # Execute the tool
-        result = execute_payment_function(request.name, json.dumps(request.arguments))
+        result = await execute_payment_function_native(
+            request.name, request.arguments
+        )
 
-        return {"content": [{"type": "text", "text": result}], "isError": False}
+        # result is already a JSON string; build the envelope once and skip
+        # the response_model re-validation/re-serialization pass
+        return ORJSONResponse(
+            {"content": [{"type": "text", "text": result}], "isError": False}
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Tool execution failed: {str(e)}")
 
 
+# Upper bound on concurrent downstream calls per batch request
+TOOL_CONCURRENCY = int(os.getenv("TOOL_CONCURRENCY", "8"))
+
+
+@app.post("/mcp/tools/call_batch")
+async def mcp_call_tool_batch(request: MCPBatchCallRequest):
+    """
+    MCP Batch Call Tool endpoint
+
+    Executes several independent tools concurrently in one round-trip
+    instead of one HTTP request per tool. Downstream fan-out is bounded
+    by a semaphore (TOOL_CONCURRENCY, default 8). Results come back in
+    request order; a failed call yields an isError entry without
+    aborting the rest of the batch.
+    """
+    sem = asyncio.Semaphore(TOOL_CONCURRENCY)
+
+    async def run(call: MCPToolCallRequest) -> str:
+        async with sem:
+            return await execute_payment_function_native(call.name, call.arguments)
+
+    results = await asyncio.gather(
+        *(run(call) for call in request.calls), return_exceptions=True
+    )
+
+    return ORJSONResponse(
+        [
+            {"content": [{"type": "text", "text": str(result)}], "isError": True}
+            if isinstance(result, BaseException)
+            else {"content": [{"type": "text", "text": result}], "isError": False}
+            for result in results
+        ]
+    )
+
+
 # Convenience endpoints for direct tool access
 @app.post("/tools/tokenize")
-def tokenize_card_direct(
+async def tokenize_card_direct(
     card_number: str,
     card_holder: str,
     expiry_month: int,
@@ -210,12 +322,12 @@ def tokenize_card_direct(
     if customer_id:
         args["customer_id"] = customer_id
 
-    result = execute_payment_function("tokenize_payment_card", json.dumps(args))
-    return json.loads(result)
+    result = await execute_payment_function_native("tokenize_payment_card", args)
+    return Response(content=result, media_type="application/json")
 
 
 @app.post("/tools/process-payment")
-def process_payment_direct(
+async def process_payment_direct(
     token: str,
     amount: float,
     customer_id: str,
@@ -232,40 +344,59 @@ def process_payment_direct(
     if description:
         args["description"] = description
 
-    result = execute_payment_function("process_payment", json.dumps(args))
-    return json.loads(result)
+    result = await execute_payment_function_native("process_payment", args)
+    return Response(content=result, media_type="application/json")
 
 
 @app.get("/tools/transaction/{transaction_id}")
-def get_transaction_direct(transaction_id: str):
+async def get_transaction_direct(transaction_id: str):
     """Direct endpoint for getting transaction details (convenience wrapper)"""
     args = {"transaction_id": transaction_id}
-    result = execute_payment_function("get_transaction", json.dumps(args))
-    return json.loads(result)
+    result = await execute_payment_function_native("get_transaction", args)
+    return Response(content=result, media_type="application/json")
 
 
 @app.get("/tools/customer/{customer_id}/transactions")
-def get_customer_transactions_direct(customer_id: str):
+async def get_customer_transactions_direct(customer_id: str):
     """Direct endpoint for getting customer transactions (convenience wrapper)"""
     args = {"customer_id": customer_id}
-    result = execute_payment_function("get_customer_transactions", json.dumps(args))
-    return json.loads(result)
+    result = await execute_payment_function_native("get_customer_transactions", args)
+    return Response(content=result, media_type="application/json")
 
 
 @app.post("/tools/transaction/{transaction_id}/refund")
-def refund_transaction_direct(transaction_id: str):
+async def refund_transaction_direct(transaction_id: str):
     """Direct endpoint for refunding a transaction (convenience wrapper)"""
     args = {"transaction_id": transaction_id}
-    result = execute_payment_function("refund_transaction", json.dumps(args))
-    return json.loads(result)
+    result = await execute_payment_function_native("refund_transaction", args)
+    return Response(content=result, media_type="application/json")
 
 
 @app.get("/tools/token/{token}")
-def get_token_info_direct(token: str):
+async def get_token_info_direct(token: str):
     """Direct endpoint for getting token information (convenience wrapper)"""
     args = {"token": token}
-    result = execute_payment_function("get_token_info", json.dumps(args))
-    return json.loads(result)
+    result = await execute_payment_function_native("get_token_info", args)
+    return Response(content=result, media_type="application/json")
+
+
+# Largest JSON-RPC body /mcp will buffer and parse
+_MAX_BODY_BYTES = int(os.getenv("MCP_MAX_BODY_BYTES", "1000000"))
+
+# JSON-RPC envelope template for /mcp: jsonrpc is always "2.0" per spec,
+# so the envelope is assembled from constant byte fragments plus the
+# request id and the (possibly pre-serialized) result
+_ENVELOPE_PREFIX = b'{"jsonrpc":"2.0","id":'
+_ENVELOPE_RESULT = b',"result":'
+_ENVELOPE_ERROR = b',"error":'
+_INIT_RESULT_BYTES = orjson.dumps(
+    {
+        "protocolVersion": "2024-11-05",
+        "capabilities": {"tools": {}},
+        "serverInfo": {"name": "payment-mcp-server", "version": "1.0.0"},
+    }
+)
+_TOOLS_RESULT_BYTES = orjson.dumps({"tools": MCP_TOOLS})
 
 
 # MCP Protocol SSE Endpoint for Azure AI Foundry
@@ -274,111 +405,105 @@ async def mcp_protocol_endpoint(request: Request):
     """
     MCP Protocol endpoint with SSE support for Azure AI Foundry.
 
-    This endpoint implements the MCP protocol over HTTP with Server-Sent Events.
-    It handles JSON-RPC 2.0 messages for initialize, tools/list, and tools/call.
+    This endpoint implements the MCP protocol over HTTP, handling JSON-RPC
+    2.0 messages for initialize, tools/list, and tools/call. Clients that
+    ask for text/event-stream get the single-frame SSE framing Azure AI
+    Foundry expects; everyone else gets a plain JSON response without the
+    chunked-encoding and generator overhead.
     """
+    # Fast-reject oversized bodies before buffering them, then parse the
+    # raw bytes with orjson instead of request.json()'s stdlib path
+    content_length = int(request.headers.get("content-length", "0"))
+    if content_length > _MAX_BODY_BYTES:
+        raise HTTPException(status_code=413, detail="Request body too large")
+
     try:
-        body = await request.json()
-    except Exception:
+        body = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON in request body")
 
-    jsonrpc = body.get("jsonrpc", "2.0")
     request_id = body.get("id")
     method = body.get("method")
     params = body.get("params", {})
+    id_bytes = orjson.dumps(request_id)
 
-    async def event_generator():
-        """Generate SSE events for MCP protocol"""
-        try:
-            if method == "initialize":
-                response = {
-                    "jsonrpc": jsonrpc,
-                    "id": request_id,
-                    "result": {
-                        "protocolVersion": "2024-11-05",
-                        "capabilities": {"tools": {}},
-                        "serverInfo": {
-                            "name": "payment-mcp-server",
-                            "version": "1.0.0",
-                        },
-                    },
-                }
-                yield f"data: {json.dumps(response)}\n\n"
-
-            elif method == "tools/list":
-                tools = get_payment_tools()
-                mcp_tools = []
-                for tool in tools:
-                    func = tool["function"]
-                    mcp_tools.append(
-                        {
-                            "name": func["name"],
-                            "description": func["description"],
-                            "inputSchema": func["parameters"],
-                        }
-                    )
-
-                response = {
-                    "jsonrpc": jsonrpc,
-                    "id": request_id,
-                    "result": {"tools": mcp_tools},
-                }
-                yield f"data: {json.dumps(response)}\n\n"
-
-            elif method == "tools/call":
-                tool_name = params.get("name")
-                arguments = params.get("arguments", {})
-
-                # Execute the tool
-                result = execute_payment_function(tool_name, json.dumps(arguments))
-
-                response = {
-                    "jsonrpc": jsonrpc,
-                    "id": request_id,
-                    "result": {
-                        "content": [{"type": "text", "text": result}],
-                        "isError": False,
-                    },
-                }
-                yield f"data: {json.dumps(response)}\n\n"
-
-            else:
-                error_response = {
-                    "jsonrpc": jsonrpc,
-                    "id": request_id,
-                    "error": {
-                        "code": -32601,
-                        "message": f"Method not found: {method}",
-                    },
-                }
-                yield f"data: {json.dumps(error_response)}\n\n"
-
-        except Exception as e:
-            error_response = {
-                "jsonrpc": jsonrpc,
-                "id": request_id,
-                "error": {
-                    "code": -32603,
-                    "message": f"Internal error: {str(e)}",
-                },
-            }
-            yield f"data: {json.dumps(error_response)}\n\n"
-
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
-    )
+    try:
+        if method == "initialize":
+            payload = (
+                _ENVELOPE_PREFIX + id_bytes + _ENVELOPE_RESULT + _INIT_RESULT_BYTES + b"}"
+            )
+
+        elif method == "tools/list":
+            payload = (
+                _ENVELOPE_PREFIX + id_bytes + _ENVELOPE_RESULT + _TOOLS_RESULT_BYTES + b"}"
+            )
+
+        elif method == "tools/call":
+            tool_name = params.get("name")
+            arguments = params.get("arguments", {})
+
+            # Execute the tool
+            result = await execute_payment_function_native(tool_name, arguments)
+
+            result_bytes = orjson.dumps(
+                {"content": [{"type": "text", "text": result}], "isError": False}
+            )
+            payload = (
+                _ENVELOPE_PREFIX + id_bytes + _ENVELOPE_RESULT + result_bytes + b"}"
+            )
+
+        else:
+            error_bytes = orjson.dumps(
+                {"code": -32601, "message": f"Method not found: {method}"}
+            )
+            payload = (
+                _ENVELOPE_PREFIX + id_bytes + _ENVELOPE_ERROR + error_bytes + b"}"
+            )
+
+    except Exception as e:
+        error_bytes = orjson.dumps(
+            {"code": -32603, "message": f"Internal error: {str(e)}"}
+        )
+        payload = _ENVELOPE_PREFIX + id_bytes + _ENVELOPE_ERROR + error_bytes + b"}"
+
+    if "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            iter([b"data: " + payload + b"\n\n"]),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "X-Accel-Buffering": "no",
+            },
+        )
+
+    return Response(content=payload, media_type="application/json")
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(
-        "mcp_api_server:app", host="0.0.0.0", port=8001, reload=True, log_level="info"
-    )
+    if os.getenv("ENV") == "prod":
+        # Production: uvloop event loop + httptools parser, one worker per
+        # core, no access log. This server is a pure I/O proxy, so
+        # throughput scales with workers; the TTL cache and connection
+        # pool are per-worker, which is fine for their roles.
+        uvicorn.run(
+            "mcp_api_server:app",
+            host="0.0.0.0",
+            port=8001,
+            loop="uvloop",
+            http="httptools",
+            workers=int(os.getenv("WORKERS", os.cpu_count() or 4)),
+            log_level="warning",
+            access_log=False,
+        )
+    else:
+        uvicorn.run(
+            "mcp_api_server:app",
+            host="0.0.0.0",
+            port=8001,
+            reload=True,
+            log_level="info",
+        )
  
\ No newline at end of file
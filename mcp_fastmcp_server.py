@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Payment MCP Server - FastMCP Transport
+
+Consolidated MCP entry point built on the official `mcp` SDK's FastMCP.
+One registration of the payment tools serves both the Streamable-HTTP
+transport (for Azure AI Foundry and other HTTP clients) and stdio (for
+VS Code, GitHub Copilot, or Claude Desktop), with dispatch, schema
+generation, and JSON-RPC framing handled in-library.
+
+The hand-rolled transports (mcp_api_server.py REST + SSE wrapper,
+mcp_server_stdio.py) remain available for clients already configured
+against them; new integrations should prefer this module.
+
+Run stdio:            python mcp_fastmcp_server.py
+Run streamable HTTP:  MCP_TRANSPORT=http python mcp_fastmcp_server.py
+"""
+
+import os
+from typing import Optional
+
+from mcp.server.fastmcp import FastMCP
+
+from mcp_server import payment_server
+
+mcp = FastMCP("payment-mcp-server")
+
+
+@mcp.tool()
+async def tokenize_payment_card(
+    card_number: str,
+    card_holder: str,
+    expiry_month: int,
+    expiry_year: int,
+    cvv: str,
+    customer_email: str,
+    billing_street: str,
+    billing_city: str,
+    billing_state: str,
+    billing_zip: str,
+    billing_country: str = "US",
+    customer_id: Optional[str] = None,
+) -> str:
+    """Tokenize a payment card for secure storage and future transactions. Returns a token that expires in 24 hours."""
+    args = {
+        "card_number": card_number,
+        "card_holder": card_holder,
+        "expiry_month": expiry_month,
+        "expiry_year": expiry_year,
+        "cvv": cvv,
+        "customer_email": customer_email,
+        "billing_street": billing_street,
+        "billing_city": billing_city,
+        "billing_state": billing_state,
+        "billing_zip": billing_zip,
+        "billing_country": billing_country,
+    }
+    if customer_id:
+        args["customer_id"] = customer_id
+    return await payment_server.execute_tool("tokenize_payment_card", args)
+
+
+@mcp.tool()
+async def process_payment(
+    token: str,
+    amount: float,
+    customer_id: str,
+    currency: str = "USD",
+    description: Optional[str] = None,
+) -> str:
+    """Process a payment using a tokenized card. Special test amounts: $0.01 (insufficient funds), $0.02 (card declined), $0.03 (pending), $10,000+ (manual review)."""
+    args = {
+        "token": token,
+        "amount": amount,
+        "currency": currency,
+        "customer_id": customer_id,
+    }
+    if description:
+        args["description"] = description
+    return await payment_server.execute_tool("process_payment", args)
+
+
+@mcp.tool()
+async def tokenize_and_charge(
+    card_number: str,
+    card_holder: str,
+    expiry_month: int,
+    expiry_year: int,
+    cvv: str,
+    customer_email: str,
+    billing_street: str,
+    billing_city: str,
+    billing_state: str,
+    billing_zip: str,
+    amount: float,
+    billing_country: str = "US",
+    currency: str = "USD",
+    customer_id: Optional[str] = None,
+    description: Optional[str] = None,
+) -> str:
+    """Tokenize a payment card and charge it in a single call. Preferred over separate tokenize/process calls for a straight checkout."""
+    args = {
+        "card_number": card_number,
+        "card_holder": card_holder,
+        "expiry_month": expiry_month,
+        "expiry_year": expiry_year,
+        "cvv": cvv,
+        "customer_email": customer_email,
+        "billing_street": billing_street,
+        "billing_city": billing_city,
+        "billing_state": billing_state,
+        "billing_zip": billing_zip,
+        "billing_country": billing_country,
+        "amount": amount,
+        "currency": currency,
+    }
+    if customer_id:
+        args["customer_id"] = customer_id
+    if description:
+        args["description"] = description
+    return await payment_server.execute_tool("tokenize_and_charge", args)
+
+
+@mcp.tool()
+async def get_transaction(transaction_id: str) -> str:
+    """Retrieve details of a specific transaction by its ID."""
+    return await payment_server.execute_tool(
+        "get_transaction", {"transaction_id": transaction_id}
+    )
+
+
+@mcp.tool()
+async def get_customer_transactions(customer_id: str) -> str:
+    """Get all transactions for a specific customer."""
+    return await payment_server.execute_tool(
+        "get_customer_transactions", {"customer_id": customer_id}
+    )
+
+
+@mcp.tool()
+async def refund_transaction(transaction_id: str) -> str:
+    """Refund a previously successful transaction."""
+    return await payment_server.execute_tool(
+        "refund_transaction", {"transaction_id": transaction_id}
+    )
+
+
+@mcp.tool()
+async def get_token_info(token: str) -> str:
+    """Get information about a payment token (for debugging purposes)."""
+    return await payment_server.execute_tool("get_token_info", {"token": token})
+
+
+@mcp.tool()
+async def get_health() -> str:
+    """Test for STG connection."""
+    return await payment_server.execute_tool("get_health", {})
+
+
+def streamable_http_app():
+    """ASGI app for mounting the Streamable-HTTP transport.
+
+    Example: `app.mount("/mcp", mcp_fastmcp_server.streamable_http_app())`
+    """
+    return mcp.streamable_http_app()
+
+
+if __name__ == "__main__":
+    if os.getenv("MCP_TRANSPORT") == "http":
+        mcp.run(transport="streamable-http")
+    else:
+        mcp.run(transport="stdio")
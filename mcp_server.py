@@ -5,15 +5,80 @@ An MCP-compatible server that provides payment processing tools using
 Microsoft Agent Framework for function calling.
 """
 
-import json
+import asyncio
+import functools
 import os
+import threading
 from typing import Any, Dict, List, Optional
 import httpx
+import orjson
+from cachetools import TTLCache
 
 # Payment API configuration
 PAYMENT_API_URL = os.getenv("PAYMENT_API_URL", "http://localhost:8000")
 STG_URL = os.getenv("STG_API_URL", os.getenv("STG_URL", "http://localhost:9000"))
 
+# Connection pool sizing for the shared client, tunable per deployment
+POOL_SIZE = int(os.getenv("PAYMENT_POOL_SIZE", "128"))
+POOL_KEEPALIVE = int(os.getenv("PAYMENT_POOL_KEEPALIVE", "64"))
+
+_shared_client: Optional[httpx.AsyncClient] = None
+
+# Read-only tools whose results may be served from a short-lived cache:
+# agents frequently re-fetch the same transaction or token while composing
+# a plan, and each hit saves a downstream HTTP round-trip
+_READ_TOOLS = frozenset(
+    {"get_transaction", "get_customer_transactions", "get_token_info"}
+)
+GET_CACHE_TTL = float(os.getenv("MCP_GET_CACHE_TTL", "5"))
+
+# Shared header dict for pre-serialized POST bodies
+_JSON_HEADERS = {"content-type": "application/json"}
+_get_cache: TTLCache = TTLCache(maxsize=10_000, ttl=GET_CACHE_TTL)
+_get_cache_lock = threading.Lock()
+
+# In-flight read coalescing: key -> Future owned by the first caller, so a
+# burst of identical concurrent lookups costs one downstream HTTP call
+_inflight: Dict[tuple, "asyncio.Future[str]"] = {}
+
+
+def get_shared_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled AsyncClient, creating it on demand.
+
+    Every PaymentMCPServer instance funnels through one keep-alive pool,
+    so concurrent tool calls reuse warm connections to the payment API
+    instead of paying a TCP handshake per instance.
+    """
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = httpx.AsyncClient(
+            base_url=PAYMENT_API_URL,
+            timeout=httpx.Timeout(30.0, connect=2.0),
+            limits=httpx.Limits(
+                max_connections=POOL_SIZE,
+                max_keepalive_connections=POOL_KEEPALIVE,
+                keepalive_expiry=30.0,
+            ),
+        )
+    return _shared_client
+
+# Dedicated event loop thread so synchronous callers (stdio server, demo
+# scripts) can drive the async tool methods without owning a loop
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+
+def _run_sync(coro):
+    """Run a coroutine to completion from synchronous code."""
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_sync_loop.run_forever, daemon=True
+            ).start()
+    return asyncio.run_coroutine_threadsafe(coro, _sync_loop).result()
+
 
 class PaymentMCPServer:
     """MCP Server for Payment API using Microsoft Agent Framework."""
@@ -21,7 +86,22 @@ class PaymentMCPServer:
     def __init__(self, api_url: str = PAYMENT_API_URL):
         self.api_url = api_url
         self.stg_api_url = STG_URL
-        self.client = httpx.Client(timeout=30.0)
+        # Single-hash-lookup dispatch instead of an if/elif chain
+        self._dispatch = {
+            "tokenize_payment_card": self._tokenize_card,
+            "process_payment": self._process_payment,
+            "tokenize_and_charge": self._tokenize_and_charge,
+            "get_transaction": self._get_transaction,
+            "get_customer_transactions": self._get_customer_transactions,
+            "refund_transaction": self._refund_transaction,
+            "get_token_info": self._get_token_info,
+            "get_health": self._get_stg_health,
+        }
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Process-wide pooled HTTP client, created lazily on first use."""
+        return get_shared_client()
 
     def get_tools(self) -> List[Dict[str, Any]]:
         """Get payment processing tools in OpenAI function format."""
@@ -131,6 +211,91 @@ class PaymentMCPServer:
                     },
                 },
             },
+            {
+                "type": "function",
+                "function": {
+                    "name": "tokenize_and_charge",
+                    "description": "Tokenize a payment card and immediately process a payment with it in a single call. Prefer this over separate tokenize + process calls when the card details and amount are both known.",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "card_number": {
+                                "type": "string",
+                                "description": "Credit card number (15-16 digits)",
+                            },
+                            "card_holder": {
+                                "type": "string",
+                                "description": "Cardholder name",
+                            },
+                            "expiry_month": {
+                                "type": "integer",
+                                "description": "Expiry month (1-12)",
+                            },
+                            "expiry_year": {
+                                "type": "integer",
+                                "description": "Expiry year (e.g., 2025)",
+                            },
+                            "cvv": {
+                                "type": "string",
+                                "description": "Card CVV (3-4 digits)",
+                            },
+                            "amount": {
+                                "type": "number",
+                                "description": "Payment amount (must be positive)",
+                            },
+                            "currency": {
+                                "type": "string",
+                                "description": "Currency code (default: USD)",
+                            },
+                            "description": {
+                                "type": "string",
+                                "description": "Optional payment description",
+                            },
+                            "customer_id": {
+                                "type": "string",
+                                "description": "Optional customer ID",
+                            },
+                            "customer_email": {
+                                "type": "string",
+                                "description": "Customer email address",
+                            },
+                            "billing_street": {
+                                "type": "string",
+                                "description": "Billing street address",
+                            },
+                            "billing_city": {
+                                "type": "string",
+                                "description": "Billing city",
+                            },
+                            "billing_state": {
+                                "type": "string",
+                                "description": "Billing state",
+                            },
+                            "billing_zip": {
+                                "type": "string",
+                                "description": "Billing ZIP code",
+                            },
+                            "billing_country": {
+                                "type": "string",
+                                "description": "Billing country (default: US)",
+                            },
+                        },
+                        "required": [
+                            "card_number",
+                            "card_holder",
+                            "expiry_month",
+                            "expiry_year",
+                            "cvv",
+                            "amount",
+                            "customer_email",
+                            "billing_street",
+                            "billing_city",
+                            "billing_state",
+                            "billing_zip",
+                        ],
+                    },
+                },
+            },
             {
                 "type": "function",
                 "function": {
@@ -213,29 +378,66 @@ class PaymentMCPServer:
             }
         ]
 
-    def execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+    async def execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
         """Execute a payment tool and return the result."""
         try:
-            if tool_name == "tokenize_payment_card":
-                return self._tokenize_card(arguments)
-            elif tool_name == "process_payment":
-                return self._process_payment(arguments)
-            elif tool_name == "get_transaction":
-                return self._get_transaction(arguments)
-            elif tool_name == "get_customer_transactions":
-                return self._get_customer_transactions(arguments)
-            elif tool_name == "refund_transaction":
-                return self._refund_transaction(arguments)
-            elif tool_name == "get_token_info":
-                return self._get_token_info(arguments)
-            elif tool_name == "get_health":
-                return self._get_stg_health()
-            else:
-                return json.dumps({"error": f"Unknown tool: {tool_name}"})
+            cache_key = None
+            if tool_name in _READ_TOOLS:
+                cache_key = (
+                    tool_name,
+                    orjson.dumps(arguments, option=orjson.OPT_SORT_KEYS),
+                )
+                cached = _get_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+                # If an identical read is already in flight on this loop,
+                # wait for its result instead of opening another call
+                fut = _inflight.get(cache_key)
+                if fut is not None and fut.get_loop() is asyncio.get_running_loop():
+                    return await fut
+
+            fn = self._dispatch.get(tool_name)
+            if fn is None:
+                return orjson.dumps({"error": f"Unknown tool: {tool_name}"}).decode()
+
+            if cache_key is not None:
+                fut = asyncio.get_running_loop().create_future()
+                _inflight[cache_key] = fut
+                try:
+                    result = await fn(arguments)
+                    fut.set_result(result)
+                except BaseException as e:
+                    fut.set_exception(e)
+                    # Consume the exception in case no other caller joined
+                    fut.exception()
+                    raise
+                finally:
+                    _inflight.pop(cache_key, None)
+
+                with _get_cache_lock:
+                    _get_cache[cache_key] = result
+                return result
+
+            result = await fn(arguments)
+
+            if tool_name == "refund_transaction":
+                # The refunded transaction's cached detail view is now
+                # stale; customer-level lists age out via the short TTL
+                with _get_cache_lock:
+                    _get_cache.pop(
+                        (
+                            "get_transaction",
+                            orjson.dumps(arguments, option=orjson.OPT_SORT_KEYS),
+                        ),
+                        None,
+                    )
+
+            return result
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return orjson.dumps({"error": str(e)}).decode()
 
-    def _tokenize_card(self, args: Dict[str, Any]) -> str:
+    async def _tokenize_card(self, args: Dict[str, Any]) -> str:
         """Tokenize a payment card."""
         request_data = {
             "card": {
@@ -258,14 +460,17 @@ class PaymentMCPServer:
             },
         }
 
-        response = self.client.post(
-            f"{self.api_url}/api/v1/tokenize",
-            json=request_data,
+        response = await self.client.post(
+            "/api/v1/tokenize",
+            content=orjson.dumps(request_data),
+            headers=_JSON_HEADERS,
         )
         response.raise_for_status()
-        return json.dumps(response.json(), indent=2)
+        return orjson.dumps(
+            orjson.loads(response.content), option=orjson.OPT_INDENT_2
+        ).decode()
 
-    def _process_payment(self, args: Dict[str, Any]) -> str:
+    async def _process_payment(self, args: Dict[str, Any]) -> str:
         """Process a payment."""
         request_data = {
             "token": args["token"],
@@ -275,80 +480,214 @@ class PaymentMCPServer:
             "description": args.get("description"),
         }
 
-        response = self.client.post(
-            f"{self.api_url}/api/v1/payments",
-            json=request_data,
+        response = await self.client.post(
+            "/api/v1/payments",
+            content=orjson.dumps(request_data),
+            headers=_JSON_HEADERS,
         )
         response.raise_for_status()
-        return json.dumps(response.json(), indent=2)
+        return orjson.dumps(
+            orjson.loads(response.content), option=orjson.OPT_INDENT_2
+        ).decode()
 
-    def _get_transaction(self, args: Dict[str, Any]) -> str:
+    async def _tokenize_and_charge(self, args: Dict[str, Any]) -> str:
+        """Tokenize a card and process a payment in one round-trip."""
+        request_data = {
+            "card": {
+                "card_number": args["card_number"],
+                "card_holder": args["card_holder"],
+                "expiry_month": args["expiry_month"],
+                "expiry_year": args["expiry_year"],
+                "cvv": args["cvv"],
+            },
+            "customer": {
+                "customer_id": args.get("customer_id"),
+                "email": args["customer_email"],
+                "billing_address": {
+                    "street": args["billing_street"],
+                    "city": args["billing_city"],
+                    "state": args["billing_state"],
+                    "zip_code": args["billing_zip"],
+                    "country": args.get("billing_country", "US"),
+                },
+            },
+            "amount": args["amount"],
+            "currency": args.get("currency", "USD"),
+            "description": args.get("description"),
+        }
+
+        response = await self.client.post(
+            "/api/v1/tokenize-and-pay",
+            content=orjson.dumps(request_data),
+            headers=_JSON_HEADERS,
+        )
+        response.raise_for_status()
+        return orjson.dumps(
+            orjson.loads(response.content), option=orjson.OPT_INDENT_2
+        ).decode()
+
+    async def _get_transaction(self, args: Dict[str, Any]) -> str:
         """Get transaction details."""
         transaction_id = args["transaction_id"]
-        response = self.client.get(
-            f"{self.api_url}/api/v1/transactions/{transaction_id}"
+        response = await self.client.get(
+            f"/api/v1/transactions/{transaction_id}"
         )
         response.raise_for_status()
-        return json.dumps(response.json(), indent=2)
+        return orjson.dumps(
+            orjson.loads(response.content), option=orjson.OPT_INDENT_2
+        ).decode()
 
-    def _get_customer_transactions(self, args: Dict[str, Any]) -> str:
+    async def _get_customer_transactions(self, args: Dict[str, Any]) -> str:
         """Get all transactions for a customer."""
         customer_id = args["customer_id"]
-        response = self.client.get(
-            f"{self.api_url}/api/v1/customers/{customer_id}/transactions"
+        response = await self.client.get(
+            f"/api/v1/customers/{customer_id}/transactions"
         )
         response.raise_for_status()
-        return json.dumps(response.json(), indent=2)
+        return orjson.dumps(
+            orjson.loads(response.content), option=orjson.OPT_INDENT_2
+        ).decode()
 
-    def _refund_transaction(self, args: Dict[str, Any]) -> str:
+    async def _refund_transaction(self, args: Dict[str, Any]) -> str:
         """Refund a transaction."""
         transaction_id = args["transaction_id"]
-        response = self.client.post(
-            f"{self.api_url}/api/v1/transactions/{transaction_id}/refund"
+        response = await self.client.post(
+            f"/api/v1/transactions/{transaction_id}/refund"
         )
         response.raise_for_status()
-        return json.dumps(response.json(), indent=2)
+        return orjson.dumps(
+            orjson.loads(response.content), option=orjson.OPT_INDENT_2
+        ).decode()
 
-    def _get_token_info(self, args: Dict[str, Any]) -> str:
+    async def _get_token_info(self, args: Dict[str, Any]) -> str:
         """Get token information."""
         token = args["token"]
-        response = self.client.get(f"{self.api_url}/api/v1/tokens/{token}")
+        response = await self.client.get(f"/api/v1/tokens/{token}")
         response.raise_for_status()
-        return json.dumps(response.json(), indent=2)
+        return orjson.dumps(
+            orjson.loads(response.content), option=orjson.OPT_INDENT_2
+        ).decode()
     
-    def _get_stg_health(self) -> str:
+    async def _get_stg_health(self, args: Dict[str, Any]) -> str:
         """Get STG health status."""
-        response = self.client.get(f"{self.stg_api_url}/tenant/health/self")
+        response = await self.client.get(f"{self.stg_api_url}/tenant/health/self")
         response.raise_for_status()
-        return json.dumps(response.json(), indent=2)
+        return orjson.dumps(
+            orjson.loads(response.content), option=orjson.OPT_INDENT_2
+        ).decode()
+
+    def execute_tool_sync(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+        """Blocking wrapper around execute_tool for synchronous callers."""
+        return _run_sync(self.execute_tool(tool_name, arguments))
+
+    async def aclose(self):
+        """Close the shared HTTP client."""
+        global _shared_client
+        if _shared_client is not None:
+            await _shared_client.aclose()
+            _shared_client = None
 
     def close(self):
-        """Close the HTTP client."""
-        self.client.close()
+        """Close the shared HTTP client (blocking wrapper)."""
+        if _shared_client is not None:
+            _run_sync(self.aclose())
+
+
+# Lazily-created global server instance. Construction is deferred (and the
+# HTTP pool deferred further, to the first tool call) so short-lived stdio
+# sessions pay as little import-time cost as possible; `payment_server`
+# stays importable via the module __getattr__ below.
+_server: Optional[PaymentMCPServer] = None
+
 
+def _get_server() -> PaymentMCPServer:
+    global _server
+    if _server is None:
+        _server = PaymentMCPServer()
+    return _server
 
-# Global server instance
-payment_server = PaymentMCPServer()
 
+def __getattr__(name: str):
+    if name == "payment_server":
+        return _get_server()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
+
+@functools.lru_cache(maxsize=1)
 def get_payment_tools():
-    """Get payment tools for use with OpenAI function calling."""
-    return payment_server.get_tools()
+    """Get payment tools for use with OpenAI function calling.
 
+    The tool schemas are static, so the list is built once and shared by
+    every caller instead of being rebuilt on each lookup.
+    """
+    return _get_server().get_tools()
 
-def execute_payment_function(function_name: str, function_args: str) -> str:
-    """Execute a payment function with given arguments."""
+
+# MCP-shaped view of the tool list, precomputed once at import: the schemas
+# are static, so every transport (HTTP, SSE, stdio) serves the same constants
+# instead of rebuilding dicts and re-serializing ~3KB per request
+MCP_TOOLS = [
+    {
+        "name": tool["function"]["name"],
+        "description": tool["function"]["description"],
+        "inputSchema": tool["function"]["parameters"],
+    }
+    for tool in get_payment_tools()
+]
+MCP_TOOLS_BYTES = orjson.dumps({"tools": MCP_TOOLS})
+
+
+async def execute_payment_function_native(
+    function_name: str, args: Dict[str, Any]
+) -> str:
+    """Execute a payment function with already-parsed arguments.
+
+    Preferred entrypoint when the caller holds a dict (FastAPI request
+    models, JSON-RPC params): it skips the dict->str->dict round trip of
+    the string-accepting wrappers.
+    """
+    try:
+        return await _get_server().execute_tool(function_name, args)
+    except Exception as e:
+        return orjson.dumps({"error": str(e)}).decode()
+
+
+async def execute_payment_function_async(function_name: str, function_args: str) -> str:
+    """Execute a payment function with JSON-string arguments (async path).
+
+    Kept for callers that hold serialized arguments (e.g. OpenAI tool
+    calls); prefer execute_payment_function_native when a dict is already
+    in hand.
+    """
     try:
         args = (
-            json.loads(function_args)
+            orjson.loads(function_args)
             if isinstance(function_args, str)
             else function_args
         )
-        return payment_server.execute_tool(function_name, args)
-    except json.JSONDecodeError as e:
-        return json.dumps({"error": f"Invalid JSON arguments: {str(e)}"})
+        return await _get_server().execute_tool(function_name, args)
+    except orjson.JSONDecodeError as e:
+        return orjson.dumps({"error": f"Invalid JSON arguments: {str(e)}"}).decode()
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return orjson.dumps({"error": str(e)}).decode()
+
+
+def execute_payment_function(function_name: str, function_args: str) -> str:
+    """Execute a payment function with given arguments."""
+    return _run_sync(execute_payment_function_async(function_name, function_args))
+
+
+def execute_payment_function_obj(
+    function_name: str, args: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Execute a payment function dict-in, dict-out (blocking).
+
+    Preferred for local callers like the demo scripts: no JSON string
+    bounce on either side. Errors come back as {"error": ...} dicts, the
+    same shape the string API encodes.
+    """
+    result = _run_sync(execute_payment_function_native(function_name, args))
+    return orjson.loads(result)
 
 
 if __name__ == "__main__":
@@ -6,26 +6,37 @@ This is a proper MCP server that communicates via stdin/stdout
 and can be configured in VS Code, GitHub Copilot, or Claude Desktop.
 """
 
-import json
+import asyncio
 import sys
 import os
 from typing import Any, Dict, List
-from mcp_server import PaymentMCPServer
 
-# Initialize payment server
-payment_server = PaymentMCPServer()
+import orjson
 
+try:
+    import uvloop
+except ImportError:
+    # uvloop is unix-only (requirements.txt excludes it on win32); the
+    # server runs fine on the default loop
+    uvloop = None
 
-def send_response(response: Dict[str, Any]):
+from mcp_server import MCP_TOOLS, payment_server
+
+# Serializes stdout writes so concurrently running tool tasks cannot
+# interleave their JSON-RPC frames
+_stdout_lock = asyncio.Lock()
+
+
+async def send_response(response: Dict[str, Any]):
     """Send a JSON-RPC response to stdout."""
-    json_str = json.dumps(response)
-    sys.stdout.write(json_str + "\n")
-    sys.stdout.flush()
+    async with _stdout_lock:
+        sys.stdout.buffer.write(orjson.dumps(response) + b"\n")
+        sys.stdout.buffer.flush()
 
 
-def send_error(request_id: Any, code: int, message: str):
+async def send_error(request_id: Any, code: int, message: str):
     """Send an error response."""
-    send_response(
+    await send_response(
         {
             "jsonrpc": "2.0",
             "id": request_id,
@@ -34,9 +45,9 @@ def send_error(request_id: Any, code: int, message: str):
     )
 
 
-def handle_initialize(request_id: Any):
+async def handle_initialize(request_id: Any):
     """Handle the initialize request."""
-    send_response(
+    await send_response(
         {
             "jsonrpc": "2.0",
             "id": request_id,
@@ -49,39 +60,27 @@ def handle_initialize(request_id: Any):
     )
 
 
-def handle_list_tools(request_id: Any):
+async def handle_list_tools(request_id: Any):
     """Handle tools/list request."""
-    tools = payment_server.get_tools()
-
-    # Convert to MCP tool format
-    mcp_tools = []
-    for tool in tools:
-        func = tool["function"]
-        mcp_tools.append(
-            {
-                "name": func["name"],
-                "description": func["description"],
-                "inputSchema": func["parameters"],
-            }
-        )
-
-    send_response({"jsonrpc": "2.0", "id": request_id, "result": {"tools": mcp_tools}})
+    await send_response(
+        {"jsonrpc": "2.0", "id": request_id, "result": {"tools": MCP_TOOLS}}
+    )
 
 
-def handle_call_tool(request_id: Any, params: Dict[str, Any]):
+async def handle_call_tool(request_id: Any, params: Dict[str, Any]):
     """Handle tools/call request."""
     tool_name = params.get("name")
     arguments = params.get("arguments", {})
 
     if not tool_name:
-        send_error(request_id, -32602, "Missing tool name")
+        await send_error(request_id, -32602, "Missing tool name")
         return
 
     try:
         # Execute the tool
-        result = payment_server.execute_tool(tool_name, arguments)
+        result = await payment_server.execute_tool(tool_name, arguments)
 
-        send_response(
+        await send_response(
             {
                 "jsonrpc": "2.0",
                 "id": request_id,
@@ -89,23 +88,72 @@ def handle_call_tool(request_id: Any, params: Dict[str, Any]):
             }
         )
     except Exception as e:
-        send_error(request_id, -32603, f"Tool execution failed: {str(e)}")
+        await send_error(request_id, -32603, f"Tool execution failed: {str(e)}")
 
 
-def handle_request(request: Dict[str, Any]):
+async def handle_request(request: Dict[str, Any]):
     """Handle incoming JSON-RPC request."""
     request_id = request.get("id")
     method = request.get("method")
     params = request.get("params", {})
 
-    if method == "initialize":
-        handle_initialize(request_id)
-    elif method == "tools/list":
-        handle_list_tools(request_id)
-    elif method == "tools/call":
-        handle_call_tool(request_id, params)
-    else:
-        send_error(request_id, -32601, f"Method not found: {method}")
+    try:
+        if method == "initialize":
+            await handle_initialize(request_id)
+        elif method == "tools/list":
+            await handle_list_tools(request_id)
+        elif method == "tools/call":
+            await handle_call_tool(request_id, params)
+        else:
+            await send_error(request_id, -32601, f"Method not found: {method}")
+    except Exception as e:
+        sys.stderr.write(f"Error handling request: {str(e)}\n")
+        sys.stderr.flush()
+
+
+async def main_async():
+    """Async server loop - reads stdin, dispatches each request as a task.
+
+    Requests run concurrently, so a slow downstream tool call no longer
+    blocks the next frame on stdin; the stdout lock keeps the response
+    stream frame-aligned.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        reader = asyncio.StreamReader()
+        protocol = asyncio.StreamReaderProtocol(reader)
+        await loop.connect_read_pipe(lambda: protocol, sys.stdin)
+        readline = reader.readline
+    except (NotImplementedError, OSError):
+        # Windows has no pipe transport for stdin; block in a worker
+        # thread instead so the loop stays free for running tool tasks
+        def readline():
+            return loop.run_in_executor(None, sys.stdin.buffer.readline)
+
+    # Strong references to in-flight request tasks: the loop itself only
+    # keeps weak ones, so an unreferenced task can be collected mid-call
+    # and its response never sent
+    tasks = set()
+
+    while line := await readline():
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            request = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            sys.stderr.write(f"Invalid JSON: {str(e)}\n")
+            sys.stderr.flush()
+            continue
+
+        task = asyncio.create_task(handle_request(request))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    # stdin closed; let in-flight tool calls finish before exiting
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
 
 
 def main():
@@ -114,23 +162,11 @@ def main():
     sys.stderr.write("Payment MCP Server starting...\n")
     sys.stderr.flush()
 
-    try:
-        # Read requests from stdin
-        for line in sys.stdin:
-            line = line.strip()
-            if not line:
-                continue
-
-            try:
-                request = json.loads(line)
-                handle_request(request)
-            except json.JSONDecodeError as e:
-                sys.stderr.write(f"Invalid JSON: {str(e)}\n")
-                sys.stderr.flush()
-            except Exception as e:
-                sys.stderr.write(f"Error handling request: {str(e)}\n")
-                sys.stderr.flush()
+    if uvloop is not None:
+        uvloop.install()
 
+    try:
+        asyncio.run(main_async())
     except KeyboardInterrupt:
         sys.stderr.write("Server stopped by user\n")
         sys.stderr.flush()
@@ -1,7 +1,15 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import Optional
 from datetime import datetime
-import re
+
+try:
+    # Optional SWAR digit check (python setup.py build_ext --inplace)
+    from _card_validate import is_ascii_digits as _is_digits
+except ImportError:
+    _is_digits = str.isdigit
+
+# C-level strip of separators; much cheaper than re.sub on short strings
+_CARD_STRIP = str.maketrans("", "", " \t\n\r-")
 
 
 class PaymentCard(BaseModel):
@@ -17,11 +25,12 @@ class PaymentCard(BaseModel):
     @classmethod
     def validate_card_number(cls, v: str) -> str:
         # Remove spaces and dashes
-        clean_number = re.sub(r"[\s-]", "", v)
-        if not clean_number.isdigit():
-            raise ValueError("Card number must contain only digits")
-        if len(clean_number) not in [15, 16]:
+        clean_number = v.translate(_CARD_STRIP)
+        # Length first: it rejects without scanning the digits
+        if len(clean_number) not in (15, 16):
             raise ValueError("Card number must be 15 or 16 digits")
+        if not _is_digits(clean_number):
+            raise ValueError("Card number must contain only digits")
         return clean_number
 
     @field_validator("cvv")
@@ -61,6 +70,8 @@ class TokenizeRequest(BaseModel):
 class TokenizeResponse(BaseModel):
     """Response with tokenized payment information"""
 
+    model_config = ConfigDict(frozen=True)
+
     token: str
     last_four_digits: str
     card_type: str
@@ -79,9 +90,21 @@ class PaymentRequest(BaseModel):
     customer_id: str
 
 
+class TokenizeAndPayRequest(BaseModel):
+    """Request to tokenize a card and immediately process a payment"""
+
+    card: PaymentCard
+    customer: Customer
+    amount: float = Field(..., gt=0, description="Payment amount")
+    currency: str = Field(default="USD", description="Currency code")
+    description: Optional[str] = None
+
+
 class PaymentResponse(BaseModel):
     """Response from payment processing"""
 
+    model_config = ConfigDict(frozen=True)
+
     transaction_id: str
     status: str  # success, failed, pending
     amount: float
@@ -90,3 +113,18 @@ class PaymentResponse(BaseModel):
     customer_id: str
     message: str
     processed_at: str
+
+
+class BatchSimulationRequest(BaseModel):
+    """Request to simulate outcomes for a batch of payment amounts"""
+
+    amounts: list[float] = Field(..., description="Payment amounts to simulate")
+
+
+class TokenizeAndPayResponse(BaseModel):
+    """Combined response from the tokenize-and-pay endpoint"""
+
+    model_config = ConfigDict(frozen=True)
+
+    tokenization: TokenizeResponse
+    payment: PaymentResponse
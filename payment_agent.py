@@ -5,9 +5,13 @@ This agent uses OpenAI's function calling to interact with the Payment MCP API.
 It can understand natural language requests and execute payment operations.
 """
 
+import functools
 import os
-import json
+import threading
 import httpx
+import orjson
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from openai import OpenAI
 
@@ -20,6 +24,60 @@ if not OPENAI_API_KEY:
         "⚠️  Warning: OPENAI_API_KEY not set. Set it with: export OPENAI_API_KEY='your-key'"
     )
 
+# Read-only tools whose results can be served from a short-lived cache;
+# agents frequently repeat the same lookup within a session
+_READ_ONLY_TOOLS = {"get_transaction", "get_token_info", "get_customer_transactions"}
+
+_JSON_HEADERS = {"content-type": "application/json"}
+
+
+@functools.lru_cache(maxsize=4)
+def _fetch_tools_cached(api_url: str) -> tuple:
+    """Fetch and convert the MCP tool list once per API URL.
+
+    The registry is static at runtime, so short-lived agents (one per
+    request or session) reuse the converted schemas instead of paying an
+    HTTP round-trip per construction. Returns a tuple so the cache entry
+    stays hashable and effectively immutable.
+    """
+    with httpx.Client(base_url=api_url, timeout=10.0) as client:
+        response = client.get("/mcp/tools/list")
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+
+    return tuple(
+        {
+            "type": "function",
+            "function": {
+                "name": tool["name"],
+                "description": tool["description"],
+                "parameters": tool["inputSchema"],
+            },
+        }
+        for tool in data["tools"]
+    )
+
+# Meta-tool for progressive disclosure: the model sees one-line tool
+# summaries in the system prompt and expands a full schema only when it
+# actually needs the tool, keeping per-turn prompt tokens small
+_DISCOVERY_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "discover_tool",
+        "description": "Fetch the full parameter schema for one of the payment tools listed in the system prompt. The tool becomes callable on your next step.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "name": {
+                    "type": "string",
+                    "description": "Name of the tool to expand",
+                }
+            },
+            "required": ["name"],
+        },
+    },
+}
+
 
 class PaymentAgent:
     """AI Agent that uses Payment MCP API as its tool backend"""
@@ -27,55 +85,133 @@ class PaymentAgent:
     def __init__(self, api_url: str = MCP_API_URL):
         self.api_url = api_url
         self.client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
-        self.http_client = httpx.Client()
+        # Pooled keep-alive client: every tool call reuses a warm TCP
+        # connection to the MCP API instead of opening a fresh one
+        self.http_client = httpx.Client(
+            base_url=api_url,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        )
         self.tools = []
         self.conversation_history = []
+        self._full_schemas = {}
+        self._discovered = set()
+        self._system_prompt = ""
+        # Tool calls are network-bound, so a small thread pool turns a
+        # multi-tool assistant turn from sum() of latencies into max()
+        self._pool = ThreadPoolExecutor(max_workers=8)
+        # Short-lived cache for read-only tool results; cachetools is not
+        # thread-safe and the pool mutates the cache from worker threads
+        self._tool_cache = TTLCache(maxsize=1024, ttl=30)
+        self._tool_cache_lock = threading.Lock()
 
         # Load tools from MCP API
         self._load_tools()
 
+        # The system prompt lives at the head of the history so every
+        # create() call sends an identical, reusable prefix
+        self.conversation_history = [
+            {"role": "system", "content": self._system_prompt}
+        ]
+
+    def close(self):
+        """Close the HTTP client and the tool-call thread pool."""
+        self._pool.shutdown(wait=False)
+        self.http_client.close()
+
     def _load_tools(self):
         """Load available tools from MCP API"""
         try:
-            response = self.http_client.get(f"{self.api_url}/mcp/tools/list")
-            response.raise_for_status()
-            data = response.json()
+            self.tools = list(_fetch_tools_cached(self.api_url))
+
+            self._full_schemas = {
+                tool["function"]["name"]: tool for tool in self.tools
+            }
+            summaries = "\n".join(
+                f"- {name}: {tool['function']['description'].split('.')[0]}"
+                for name, tool in self._full_schemas.items()
+            )
+            self._system_prompt = f"""You are a helpful payment processing assistant. You have access to these payment tools:
+{summaries}
 
-            # Convert MCP tools to OpenAI function format
-            self.tools = []
-            for tool in data["tools"]:
-                self.tools.append(
-                    {
-                        "type": "function",
-                        "function": {
-                            "name": tool["name"],
-                            "description": tool["description"],
-                            "parameters": tool["inputSchema"],
-                        },
-                    }
-                )
+Only short summaries are loaded. Call discover_tool(name) to fetch a tool's full parameter schema before using it for the first time.
+When users provide payment card information, always tokenize it first before processing payments.
+Be helpful, accurate, and secure. Always confirm important actions before executing them."""
 
             print(f"✓ Loaded {len(self.tools)} tools from MCP API")
         except Exception as e:
             print(f"✗ Failed to load tools: {e}")
 
+    def _active_tools(self) -> List[Dict[str, Any]]:
+        """Tools sent to the model: the discovery meta-tool plus schemas
+        the conversation has already expanded."""
+        return [_DISCOVERY_TOOL] + [
+            self._full_schemas[name] for name in sorted(self._discovered)
+        ]
+
+    def _discover_tool(self, arguments: Dict[str, Any]) -> str:
+        """Expand a tool schema for the rest of the conversation."""
+        name = arguments.get("name", "")
+        tool = self._full_schemas.get(name)
+        if tool is None:
+            return orjson.dumps(
+                {"error": f"Unknown tool: {name}", "available": list(self._full_schemas)}
+            ).decode()
+        self._discovered.add(name)
+        return orjson.dumps(tool["function"]).decode()
+
     def _execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
         """Execute a tool via MCP API"""
+        cache_key = None
+        if tool_name in _READ_ONLY_TOOLS:
+            cache_key = (
+                tool_name,
+                orjson.dumps(arguments, option=orjson.OPT_SORT_KEYS),
+            )
+            with self._tool_cache_lock:
+                cached = self._tool_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         try:
             response = self.http_client.post(
-                f"{self.api_url}/mcp/tools/call",
-                json={"name": tool_name, "arguments": arguments},
+                "/mcp/tools/call",
+                content=orjson.dumps({"name": tool_name, "arguments": arguments}),
+                headers=_JSON_HEADERS,
             )
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             # Extract text from content
             if "content" in data and len(data["content"]) > 0:
-                return data["content"][0]["text"]
-            return json.dumps(data)
+                result = data["content"][0]["text"]
+            else:
+                result = orjson.dumps(data).decode()
         except Exception as e:
             return f"Error executing tool: {str(e)}"
 
+        if cache_key is not None:
+            with self._tool_cache_lock:
+                self._tool_cache[cache_key] = result
+        elif tool_name in ("process_payment", "refund_transaction", "tokenize_and_charge"):
+            self._invalidate_cached_reads(arguments)
+
+        return result
+
+    def _invalidate_cached_reads(self, arguments: Dict[str, Any]):
+        """Drop cached reads referencing ids touched by a write."""
+        # Cache keys carry orjson bytes, so compare bytes against bytes
+        ids = {
+            value.encode() for value in arguments.values() if isinstance(value, str)
+        }
+        if not ids:
+            return
+        with self._tool_cache_lock:
+            for key in list(self._tool_cache.keys()):
+                _, args_json = key
+                if any(identifier in args_json for identifier in ids):
+                    self._tool_cache.pop(key, None)
+
     def chat(self, user_message: str) -> str:
         """
         Process a user message and return the agent's response.
@@ -87,108 +223,171 @@ class PaymentAgent:
         # Add user message to conversation
         self.conversation_history.append({"role": "user", "content": user_message})
 
-        # Call OpenAI with tools
+        # Call OpenAI with the discovery tool plus any expanded schemas;
+        # the history already starts with the system prompt
         response = self.client.chat.completions.create(
             model="gpt-4-turbo-preview",
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are a helpful payment processing assistant. You have access to payment tools to:
-- Tokenize credit/debit cards for secure storage
-- Process payments using tokenized cards
-- Retrieve transaction details
-- Get customer transaction history
-- Process refunds
-- Get token information
-
-When users provide payment card information, always tokenize it first before processing payments.
-Be helpful, accurate, and secure. Always confirm important actions before executing them.""",
-                },
-                *self.conversation_history,
-            ],
-            tools=self.tools,
+            messages=self.conversation_history,
+            tools=self._active_tools(),
             tool_choice="auto",
         )
 
         assistant_message = response.choices[0].message
 
-        # Check if the model wants to call functions
-        if assistant_message.tool_calls:
-            # Add assistant message with tool calls to history
+        # Keep resolving tool calls until the model produces a final
+        # answer; discover_tool expansions become callable on the next pass
+        while assistant_message.tool_calls:
+            # Add assistant message with tool calls to history; pydantic's
+            # model_dump is the Rust-backed path, no hand-rolled dict walk
             self.conversation_history.append(
-                {
-                    "role": "assistant",
-                    "content": assistant_message.content,
-                    "tool_calls": [
-                        {
-                            "id": tc.id,
-                            "type": "function",
-                            "function": {
-                                "name": tc.function.name,
-                                "arguments": tc.function.arguments,
-                            },
-                        }
-                        for tc in assistant_message.tool_calls
-                    ],
-                }
+                assistant_message.model_dump(exclude_none=True)
             )
 
-            # Execute all tool calls
+            # Execute all tool calls concurrently, then append the
+            # responses in the original order OpenAI expects; discovery is
+            # resolved locally without touching the pool
+            results = []
             for tool_call in assistant_message.tool_calls:
                 function_name = tool_call.function.name
-                function_args = json.loads(tool_call.function.arguments)
+                function_args = orjson.loads(tool_call.function.arguments)
 
                 print(f"🔧 Executing: {function_name}")
 
-                # Execute via MCP API
-                function_response = self._execute_tool(function_name, function_args)
+                if function_name == "discover_tool":
+                    results.append(self._discover_tool(function_args))
+                else:
+                    results.append(
+                        self._pool.submit(
+                            self._execute_tool, function_name, function_args
+                        )
+                    )
 
-                # Add tool response to conversation
+            for tool_call, result in zip(assistant_message.tool_calls, results):
                 self.conversation_history.append(
                     {
                         "role": "tool",
                         "tool_call_id": tool_call.id,
-                        "content": function_response,
+                        "content": result if isinstance(result, str) else result.result(),
                     }
                 )
 
-            # Get final response from model
-            final_response = self.client.chat.completions.create(
+            response = self.client.chat.completions.create(
                 model="gpt-4-turbo-preview",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a helpful payment processing assistant. You have access to payment tools to:
-- Tokenize credit/debit cards for secure storage
-- Process payments using tokenized cards
-- Retrieve transaction details
-- Get customer transaction history
-- Process refunds
-- Get token information
-
-When users provide payment card information, always tokenize it first before processing payments.
-Be helpful, accurate, and secure. Always confirm important actions before executing them.""",
-                    },
-                    *self.conversation_history,
-                ],
+                messages=self.conversation_history,
+                tools=self._active_tools(),
+                tool_choice="auto",
             )
+            assistant_message = response.choices[0].message
 
-            final_message = final_response.choices[0].message.content
-            self.conversation_history.append(
-                {"role": "assistant", "content": final_message}
+        self.conversation_history.append(
+            {"role": "assistant", "content": assistant_message.content}
+        )
+        return assistant_message.content
+
+    def chat_stream(self, user_message: str):
+        """
+        Process a user message and yield the agent's response token by
+        token. Tool calls are resolved between streamed completions, so
+        the user sees the first characters at time-to-first-token instead
+        of waiting for the full message.
+        """
+        if not self.client:
+            yield "❌ OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."
+            return
+
+        # Add user message to conversation
+        self.conversation_history.append({"role": "user", "content": user_message})
+
+        while True:
+            stream = self.client.chat.completions.create(
+                model="gpt-4-turbo-preview",
+                messages=self.conversation_history,
+                tools=self._active_tools(),
+                tool_choice="auto",
+                stream=True,
             )
 
-            return final_message
-        else:
-            # No function call, just return the response
+            # Assemble the message from deltas, yielding content as it
+            # arrives and accumulating any tool calls
+            content_parts = []
+            pending_calls = {}
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content_parts.append(delta.content)
+                    yield delta.content
+                for tc in delta.tool_calls or ():
+                    entry = pending_calls.setdefault(
+                        tc.index, {"id": "", "name": "", "arguments": []}
+                    )
+                    if tc.id:
+                        entry["id"] = tc.id
+                    if tc.function.name:
+                        entry["name"] = tc.function.name
+                    if tc.function.arguments:
+                        entry["arguments"].append(tc.function.arguments)
+
+            content = "".join(content_parts)
+
+            if not pending_calls:
+                self.conversation_history.append(
+                    {"role": "assistant", "content": content}
+                )
+                return
+
+            # Assemble straight into the history wire format so the list
+            # is built once instead of being mirrored a second time
+            calls = [
+                {
+                    "id": entry["id"],
+                    "type": "function",
+                    "function": {
+                        "name": entry["name"],
+                        "arguments": "".join(entry["arguments"]),
+                    },
+                }
+                for _, entry in sorted(pending_calls.items())
+            ]
+
             self.conversation_history.append(
-                {"role": "assistant", "content": assistant_message.content}
+                {
+                    "role": "assistant",
+                    "content": content or None,
+                    "tool_calls": calls,
+                }
             )
-            return assistant_message.content
+
+            results = []
+            for call in calls:
+                func = call["function"]
+                print(f"🔧 Executing: {func['name']}")
+                args = orjson.loads(func["arguments"]) if func["arguments"] else {}
+                if func["name"] == "discover_tool":
+                    results.append(self._discover_tool(args))
+                else:
+                    results.append(
+                        self._pool.submit(self._execute_tool, func["name"], args)
+                    )
+
+            for call, result in zip(calls, results):
+                self.conversation_history.append(
+                    {
+                        "role": "tool",
+                        "tool_call_id": call["id"],
+                        "content": result
+                        if isinstance(result, str)
+                        else result.result(),
+                    }
+                )
 
     def reset_conversation(self):
         """Reset the conversation history"""
-        self.conversation_history = []
+        self.conversation_history = [
+            {"role": "system", "content": self._system_prompt}
+        ]
+        self._discovered = set()
         print("✓ Conversation reset")
 
 
@@ -243,10 +442,11 @@ def main():
                 print("  • What info do you have on token tok_xyz?")
                 continue
 
-            # Get agent response
+            # Stream agent response as it is generated
             print("\n🤖 Agent: ", end="", flush=True)
-            response = agent.chat(user_input)
-            print(response)
+            for token in agent.chat_stream(user_input):
+                print(token, end="", flush=True)
+            print()
 
         except KeyboardInterrupt:
             print("\n\n👋 Goodbye!\n")
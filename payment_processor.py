@@ -1,9 +1,17 @@
+import itertools
+import os
 import random
-import secrets
+import time
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from enum import Enum
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; stdlib random remains the fallback
+    np = None
+
 
 class PaymentStatus(str, Enum):
     SUCCESS = "success"
@@ -11,12 +19,40 @@ class PaymentStatus(str, Enum):
     PENDING = "pending"
 
 
+# Transaction-id components: a per-process random prefix plus a C-level
+# counter keep ids unique without strftime or a urandom read per call
+_ID_PREFIX = os.urandom(4).hex()
+_ID_COUNTER = itertools.count()
+
+# Special test amounts resolved with one dict lookup instead of a chain
+# of float comparisons
+_SPECIAL_AMOUNTS = {
+    0.01: (PaymentStatus.FAILED, "Insufficient funds"),
+    0.02: (PaymentStatus.FAILED, "Card declined"),
+    0.03: (PaymentStatus.PENDING, "Payment pending verification"),
+}
+
+
 class PaymentProcessor:
     """Service to handle payment processing"""
 
     def __init__(self):
         # In-memory storage for transactions
         self.transactions: Dict[str, dict] = {}
+        # Secondary index: customer_id -> transaction records in insert
+        # order, so per-customer queries avoid a full scan of the store
+        # and a per-row id lookup
+        self._by_customer: Dict[str, List[dict]] = defaultdict(list)
+        # Per-customer write counter, used as an HTTP cache validator
+        self._customer_version: Dict[str, int] = {}
+        # Uniform draws come from a numpy buffer refilled in blocks, which
+        # amortizes per-draw Python overhead under burst load
+        if np is not None:
+            self._rng = np.random.default_rng()
+            self._rng_buf = self._rng.random(4096)
+            self._rng_i = 0
+        else:
+            self._rand = random.random
 
     def process_payment(
         self,
@@ -31,8 +67,9 @@ class PaymentProcessor:
         Process a payment using a tokenized card
         Simulates payment processing with mock results
         """
-        # Generate transaction ID
-        transaction_id = self._generate_transaction_id()
+        # One timestamp per payment, shared by the id and the record
+        now_ms = time.time() * 1000
+        transaction_id = self._generate_transaction_id(now_ms)
 
         # Simulate payment processing (90% success rate)
         status, message = self._simulate_processing(amount)
@@ -47,7 +84,7 @@ class PaymentProcessor:
             "description": description,
             "status": status,
             "message": message,
-            "processed_at": datetime.utcnow().isoformat(),
+            "processed_at": datetime.utcfromtimestamp(now_ms / 1000).isoformat(),
             "card_info": {
                 "last_four": (
                     token_data.get("last_four_digits") if token_data else "XXXX"
@@ -58,14 +95,38 @@ class PaymentProcessor:
 
         # Store transaction
         self.transactions[transaction_id] = transaction
+        self._by_customer[customer_id].append(transaction)
+        self._bump_customer_version(customer_id)
 
         return transaction
 
-    def _generate_transaction_id(self) -> str:
+    def _bump_customer_version(self, customer_id: str):
+        """Advance the customer's version counter after a write"""
+        self._customer_version[customer_id] = (
+            self._customer_version.get(customer_id, 0) + 1
+        )
+
+    def get_customer_version(self, customer_id: str) -> int:
+        """Current version of a customer's transaction history"""
+        return self._customer_version.get(customer_id, 0)
+
+    def _generate_transaction_id(self, now_ms: Optional[float] = None) -> str:
         """Generate unique transaction ID"""
-        timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-        random_part = secrets.token_hex(8)
-        return f"txn_{timestamp}_{random_part}"
+        # time.time() is vDSO-backed (no syscall); ids stay roughly
+        # time-sortable via the millisecond prefix
+        if now_ms is None:
+            now_ms = time.time() * 1000
+        return f"txn_{int(now_ms):x}_{_ID_PREFIX}{next(_ID_COUNTER):08x}"
+
+    def _rand(self) -> float:
+        """Next uniform draw from the block-refilled numpy buffer."""
+        i = self._rng_i
+        buf = self._rng_buf
+        if i >= len(buf):
+            buf = self._rng_buf = self._rng.random(4096)
+            i = 0
+        self._rng_i = i + 1
+        return buf[i]
 
     def _simulate_processing(self, amount: float) -> tuple:
         """
@@ -73,17 +134,14 @@ class PaymentProcessor:
         Returns (status, message) tuple
         """
         # Special amounts for testing specific scenarios
-        if amount == 0.01:
-            return PaymentStatus.FAILED, "Insufficient funds"
-        elif amount == 0.02:
-            return PaymentStatus.FAILED, "Card declined"
-        elif amount == 0.03:
-            return PaymentStatus.PENDING, "Payment pending verification"
-        elif amount >= 10000:
+        special = _SPECIAL_AMOUNTS.get(amount)
+        if special is not None:
+            return special
+        if amount >= 10000:
             return PaymentStatus.PENDING, "Large transaction - manual review required"
 
         # Random simulation (90% success rate)
-        outcome = random.random()
+        outcome = self._rand()
 
         if outcome < 0.90:
             return PaymentStatus.SUCCESS, "Payment processed successfully"
@@ -92,15 +150,40 @@ class PaymentProcessor:
         else:
             return PaymentStatus.PENDING, "Payment under review"
 
+    def simulate_processing_batch(self, amounts) -> list:
+        """Simulate outcomes for a batch of amounts in one vectorized pass
+
+        Load-test helper: returns a status string per amount without
+        creating transaction records. With numpy installed the random
+        draws, the 90/5/5 split, and the special-amount overrides are all
+        computed in C; otherwise it falls back to the scalar simulator.
+        """
+        if np is None:
+            return [self._simulate_processing(amount)[0].value for amount in amounts]
+
+        arr = np.asarray(amounts, dtype=np.float64)
+        draws = self._rng.random(arr.size)
+
+        # 0 = success, 1 = failed, 2 = pending; random split first, then
+        # the deterministic special amounts override
+        statuses = np.where(draws < 0.90, 0, np.where(draws < 0.95, 1, 2))
+        statuses[(arr == 0.01) | (arr == 0.02)] = 1
+        statuses[(arr == 0.03) | (arr >= 10000)] = 2
+
+        codes = (
+            PaymentStatus.SUCCESS.value,
+            PaymentStatus.FAILED.value,
+            PaymentStatus.PENDING.value,
+        )
+        return [codes[status] for status in statuses]
+
     def get_transaction(self, transaction_id: str) -> Optional[dict]:
         """Retrieve transaction by ID"""
         return self.transactions.get(transaction_id)
 
     def get_customer_transactions(self, customer_id: str) -> list:
         """Get all transactions for a customer"""
-        return [
-            tx for tx in self.transactions.values() if tx["customer_id"] == customer_id
-        ]
+        return list(self._by_customer.get(customer_id, ()))
 
     def refund_transaction(self, transaction_id: str) -> Optional[dict]:
         """Simulate a refund for a transaction"""
@@ -116,7 +199,8 @@ class PaymentProcessor:
             }
 
         # Create refund transaction
-        refund_id = self._generate_transaction_id()
+        now_ms = time.time() * 1000
+        refund_id = self._generate_transaction_id(now_ms)
         refund = {
             "refund_id": refund_id,
             "original_transaction_id": transaction_id,
@@ -125,11 +209,13 @@ class PaymentProcessor:
             "customer_id": transaction["customer_id"],
             "status": PaymentStatus.SUCCESS,
             "message": "Refund processed successfully",
-            "processed_at": datetime.utcnow().isoformat(),
+            "processed_at": datetime.utcfromtimestamp(now_ms / 1000).isoformat(),
         }
 
         # Store refund as a transaction
         self.transactions[refund_id] = refund
+        self._by_customer[transaction["customer_id"]].append(refund)
+        self._bump_customer_version(transaction["customer_id"])
 
         # Mark original transaction as refunded
         transaction["refunded"] = True
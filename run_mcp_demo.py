@@ -6,8 +6,31 @@ This script demonstrates how to use the Payment MCP Server
 in an interactive conversational mode.
 """
 
+import functools
 import json
-from mcp_server import get_payment_tools, execute_payment_function
+from mcp_server import get_payment_tools, execute_payment_function_obj
+
+# Static menu text built once; the loop prints a single prompt per
+# iteration instead of ~15 writes
+_MENU = "\n".join(
+    [
+        "",
+        "-" * 70,
+        "Available Operations:",
+        "-" * 70,
+        "1. Tokenize a Payment Card",
+        "2. Process a Payment",
+        "3. Get Transaction Details",
+        "4. Get Customer Transactions",
+        "5. Refund a Transaction",
+        "6. Get Token Information",
+        "7. Show All Available Tools",
+        "8. Run Quick Demo",
+        "9. Exit",
+        "m. Show this menu again",
+        "-" * 70,
+    ]
+)
 
 
 def print_banner():
@@ -21,19 +44,7 @@ def print_banner():
 
 def show_menu():
     """Show available operations menu."""
-    print("\n" + "-" * 70)
-    print("Available Operations:")
-    print("-" * 70)
-    print("1. Tokenize a Payment Card")
-    print("2. Process a Payment")
-    print("3. Get Transaction Details")
-    print("4. Get Customer Transactions")
-    print("5. Refund a Transaction")
-    print("6. Get Token Information")
-    print("7. Show All Available Tools")
-    print("8. Run Quick Demo")
-    print("9. Exit")
-    print("-" * 70)
+    print(_MENU)
 
 
 def tokenize_card_interactive():
@@ -58,8 +69,7 @@ def tokenize_card_interactive():
     }
 
     print("\nExecuting: tokenize_payment_card")
-    result = execute_payment_function("tokenize_payment_card", json.dumps(args))
-    result_data = json.loads(result)
+    result_data = execute_payment_function_obj("tokenize_payment_card", args)
 
     print("\n✅ Result:")
     print(json.dumps(result_data, indent=2))
@@ -88,8 +98,7 @@ def process_payment_interactive(token=None):
     }
 
     print("\nExecuting: process_payment")
-    result = execute_payment_function("process_payment", json.dumps(args))
-    result_data = json.loads(result)
+    result_data = execute_payment_function_obj("process_payment", args)
 
     print("\n✅ Result:")
     print(json.dumps(result_data, indent=2))
@@ -112,26 +121,29 @@ def get_transaction_interactive(transaction_id=None):
     args = {"transaction_id": transaction_id}
 
     print(f"\nExecuting: get_transaction for {transaction_id}")
-    result = execute_payment_function("get_transaction", json.dumps(args))
-    result_data = json.loads(result)
+    result_data = execute_payment_function_obj("get_transaction", args)
 
     print("\n✅ Result:")
     print(json.dumps(result_data, indent=2))
 
 
-def show_tools():
-    """Display all available tools."""
-    print("\n🔧 Available Payment Tools")
-    print("=" * 70)
-
-    tools = get_payment_tools()
-    for i, tool in enumerate(tools, 1):
+@functools.cache
+def _formatted_tools() -> str:
+    """Render the static tool list once."""
+    lines = ["\n🔧 Available Payment Tools", "=" * 70]
+    for i, tool in enumerate(get_payment_tools(), 1):
         func = tool["function"]
-        print(f"\n{i}. {func['name']}")
-        print(f"   Description: {func['description']}")
-        print(
+        lines.append(f"\n{i}. {func['name']}")
+        lines.append(f"   Description: {func['description']}")
+        lines.append(
             f"   Parameters: {len(func['parameters'].get('properties', {}))} required fields"
         )
+    return "\n".join(lines)
+
+
+def show_tools():
+    """Display all available tools."""
+    print(_formatted_tools())
 
 
 def run_quick_demo():
@@ -168,11 +180,12 @@ def main():
     current_token = None
     current_transaction = None
 
-    while True:
-        show_menu()
+    # Menu is printed once; 'm' reprints it on demand
+    show_menu()
 
+    while True:
         try:
-            choice = input("\nSelect an option (1-9): ").strip()
+            choice = input("\nSelect an option (1-9, m for menu): ").strip()
 
             if choice == "1":
                 current_token = tokenize_card_interactive()
@@ -193,11 +206,11 @@ def main():
                 if not customer_id:
                     customer_id = "cust_demo"
                 args = {"customer_id": customer_id}
-                result = execute_payment_function(
-                    "get_customer_transactions", json.dumps(args)
+                result = execute_payment_function_obj(
+                    "get_customer_transactions", args
                 )
                 print("\n✅ Result:")
-                print(json.dumps(json.loads(result), indent=2))
+                print(json.dumps(result, indent=2))
 
             elif choice == "5":
                 if not current_transaction:
@@ -206,22 +219,18 @@ def main():
                     ).strip()
                 if current_transaction:
                     args = {"transaction_id": current_transaction}
-                    result = execute_payment_function(
-                        "refund_transaction", json.dumps(args)
-                    )
+                    result = execute_payment_function_obj("refund_transaction", args)
                     print("\n✅ Result:")
-                    print(json.dumps(json.loads(result), indent=2))
+                    print(json.dumps(result, indent=2))
 
             elif choice == "6":
                 if not current_token:
                     current_token = input("\nEnter token: ").strip()
                 if current_token:
                     args = {"token": current_token}
-                    result = execute_payment_function(
-                        "get_token_info", json.dumps(args)
-                    )
+                    result = execute_payment_function_obj("get_token_info", args)
                     print("\n✅ Result:")
-                    print(json.dumps(json.loads(result), indent=2))
+                    print(json.dumps(result, indent=2))
 
             elif choice == "7":
                 show_tools()
@@ -233,6 +242,9 @@ def main():
                 print("\n👋 Goodbye!")
                 break
 
+            elif choice.lower() == "m":
+                show_menu()
+
             else:
                 print("\n⚠️  Invalid option. Please select 1-9.")
 
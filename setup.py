@@ -0,0 +1,32 @@
+"""
+Optional build script for the compiled fast paths.
+
+The API runs fine as pure Python; building shaves interpreter overhead
+off the custom field validators that run on every tokenize/payment
+request. Two independent pieces, both opt-in so deployments without a
+C toolchain are unaffected:
+
+- `_card_validate`: a tiny C extension with a SWAR ASCII-digit check
+  used by the card-number validator (only needs a C compiler).
+- Cython compilation of models.py (additionally needs `pip install
+  cython`; skipped automatically when Cython is absent).
+
+Usage:
+    python setup.py build_ext --inplace
+"""
+
+from setuptools import Extension, setup
+
+ext_modules = [Extension("_card_validate", ["_card_validate.c"])]
+
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    pass
+else:
+    ext_modules += cythonize(["models.py"], language_level=3)
+
+setup(
+    name="payment-mock-api",
+    ext_modules=ext_modules,
+)
@@ -1,43 +1,140 @@
+import orjson
 import pytest
-from starlette.testclient import TestClient
-
-
-# Import at module level but create test_client lazily
-@pytest.fixture(scope="session")
-def test_client():
-    """Create test client - app is first positional arg, not keyword arg"""
-    from main import app
-
-    return TestClient(app)
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+# Resolve the app and service singletons once; the autouse fixture below
+# only clears the captured references instead of re-importing per test
+from main import app, processor, tokenizer
+
+# Shared request-body building blocks; tests that need variations merge
+# overrides with {**_BASE_CARD, ...} instead of rebuilding the literals
+_BASE_CARD = {
+    "card_number": "4532015112830366",
+    "card_holder": "John Doe",
+    "expiry_month": 12,
+    "expiry_year": 2025,
+    "cvv": "123",
+}
+
+_BASE_CUSTOMER = {
+    "email": "john@example.com",
+    "billing_address": {
+        "street": "123 St",
+        "city": "City",
+        "state": "ST",
+        "zip_code": "12345",
+        "country": "US",
+    },
+}
+
+_CUSTOMER_123 = {**_BASE_CUSTOMER, "customer_id": "cust_123"}
+
+_JSON_HEADERS = {"content-type": "application/json"}
+
+# Fully-populated request exercising the optional customer fields
+_FULL_TOKENIZE_REQUEST = {
+    "card": _BASE_CARD,
+    "customer": {
+        "customer_id": "cust_123",
+        "email": "john.doe@example.com",
+        "phone": "+1-555-0123",
+        "billing_address": {
+            "street": "123 Main St",
+            "city": "New York",
+            "state": "NY",
+            "zip_code": "10001",
+            "country": "US",
+        },
+    },
+}
+
+# Fixed payloads serialized once at import; tests that never mutate the
+# body post the bytes directly instead of paying a dumps per call
+_FULL_TOKENIZE_BODY = orjson.dumps(_FULL_TOKENIZE_REQUEST)
+_BASE_TOKENIZE_BODY = orjson.dumps({"card": _BASE_CARD, "customer": _BASE_CUSTOMER})
+
+
+def _json(response):
+    """Decode a response with orjson instead of Response.json's stdlib path."""
+    return orjson.loads(response.content)
+
+
+@pytest_asyncio.fixture(scope="session")
+async def test_client():
+    """Session-wide client driving the ASGI app in-process.
+
+    ASGITransport calls the app directly on the test's event loop — no
+    background thread or portal per request like starlette's TestClient.
+    ASGITransport skips lifespan, so the app's startup/shutdown hooks are
+    run here explicitly — exactly once for the whole session.
+    """
+    transport = ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=transport,
+            base_url="http://testserver",
+            follow_redirects=False,
+        ) as client:
+            yield client
 
 
 @pytest.fixture(autouse=True)
 def reset_services():
     """Reset services before each test"""
-    from main import tokenizer, processor
-
     tokenizer.tokens.clear()
+    tokenizer._expiry_heap.clear()
     processor.transactions.clear()
+    processor._by_customer.clear()
+    processor._customer_version.clear()
     yield
 
 
+@pytest.fixture
+def token():
+    """Mint a token through the service layer, skipping the HTTP stack.
+
+    Tests that exercise payments/retrieval only need a valid token; going
+    through POST /api/v1/tokenize for setup pays routing, validation, and
+    JSON costs that belong to the tokenization tests.
+    """
+    return tokenizer.tokenize_card(**_BASE_CARD)["token"]
+
+
+@pytest.fixture
+def seeded_transaction(token):
+    """Record a transaction via the service layer for read-only tests.
+
+    Tests that only verify GET semantics don't need to build their state
+    through POST /api/v1/payments.
+    """
+    return processor.process_payment(
+        token=token,
+        amount=99.99,
+        currency="USD",
+        customer_id="cust_123",
+        description=None,
+        token_data=tokenizer.validate_token(token),
+    )
+
+
 class TestRootEndpoints:
     """Test root and health endpoints"""
 
-    def test_read_root(self, test_client):
+    async def test_read_root(self, test_client):
         """Test root endpoint returns API information"""
-        response = test_client.get("/")
+        response = await test_client.get("/")
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["service"] == "Payment Mock API"
         assert data["version"] == "1.0.0"
         assert "endpoints" in data
 
-    def test_health_check(self, test_client):
+    async def test_health_check(self, test_client):
         """Test health check endpoint"""
-        response = test_client.get("/health")
+        response = await test_client.get("/health")
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["status"] == "healthy"
         assert "timestamp" in data
 
@@ -45,33 +142,13 @@ class TestRootEndpoints:
 class TestTokenization:
     """Test payment tokenization endpoint"""
 
-    def test_tokenize_payment_success(self, test_client):
+    async def test_tokenize_payment_success(self, test_client):
         """Test successful payment tokenization"""
-        request_data = {
-            "card": {
-                "card_number": "4532015112830366",
-                "card_holder": "John Doe",
-                "expiry_month": 12,
-                "expiry_year": 2025,
-                "cvv": "123",
-            },
-            "customer": {
-                "customer_id": "cust_123",
-                "email": "john.doe@example.com",
-                "phone": "+1-555-0123",
-                "billing_address": {
-                    "street": "123 Main St",
-                    "city": "New York",
-                    "state": "NY",
-                    "zip_code": "10001",
-                    "country": "US",
-                },
-            },
-        }
-
-        response = test_client.post("/api/v1/tokenize", json=request_data)
+        response = await test_client.post(
+            "/api/v1/tokenize", content=_FULL_TOKENIZE_BODY, headers=_JSON_HEADERS
+        )
         assert response.status_code == 201
-        data = response.json()
+        data = _json(response)
 
         assert "token" in data
         assert data["token"].startswith("tok_")
@@ -81,134 +158,42 @@ class TestTokenization:
         assert "expires_at" in data
         assert "created_at" in data
 
-    def test_tokenize_visa_card(self, test_client):
-        """Test tokenization identifies Visa card"""
-        request_data = {
-            "card": {
-                "card_number": "4532015112830366",
-                "card_holder": "John Doe",
-                "expiry_month": 12,
-                "expiry_year": 2025,
-                "cvv": "123",
-            },
-            "customer": {
-                "email": "test@example.com",
-                "billing_address": {
-                    "street": "123 St",
-                    "city": "City",
-                    "state": "ST",
-                    "zip_code": "12345",
-                    "country": "US",
-                },
-            },
-        }
-
-        response = test_client.post("/api/v1/tokenize", json=request_data)
-        assert response.status_code == 201
-        assert response.json()["card_type"] == "Visa"
-
-    def test_tokenize_mastercard(self, test_client):
-        """Test tokenization identifies Mastercard"""
+    @pytest.mark.parametrize(
+        "card_number,cvv,expected_brand",
+        [
+            ("4532015112830366", "123", "Visa"),
+            ("5425233430109903", "456", "Mastercard"),
+            ("374245455400126", "1234", "American Express"),
+        ],
+    )
+    async def test_tokenize_card_brand(self, test_client, card_number, cvv, expected_brand):
+        """Test tokenization identifies the card brand"""
         request_data = {
-            "card": {
-                "card_number": "5425233430109903",
-                "card_holder": "Jane Smith",
-                "expiry_month": 6,
-                "expiry_year": 2026,
-                "cvv": "456",
-            },
-            "customer": {
-                "email": "jane@example.com",
-                "billing_address": {
-                    "street": "456 Ave",
-                    "city": "City",
-                    "state": "ST",
-                    "zip_code": "54321",
-                    "country": "US",
-                },
-            },
+            "card": {**_BASE_CARD, "card_number": card_number, "cvv": cvv},
+            "customer": _BASE_CUSTOMER,
         }
 
-        response = test_client.post("/api/v1/tokenize", json=request_data)
+        response = await test_client.post("/api/v1/tokenize", json=request_data)
         assert response.status_code == 201
-        assert response.json()["card_type"] == "Mastercard"
+        assert _json(response)["card_type"] == expected_brand
 
-    def test_tokenize_amex(self, test_client):
-        """Test tokenization identifies American Express"""
-        request_data = {
-            "card": {
-                "card_number": "374245455400126",
-                "card_holder": "Bob Johnson",
-                "expiry_month": 3,
-                "expiry_year": 2027,
-                "cvv": "1234",
-            },
-            "customer": {
-                "email": "bob@example.com",
-                "billing_address": {
-                    "street": "789 Blvd",
-                    "city": "City",
-                    "state": "ST",
-                    "zip_code": "67890",
-                    "country": "US",
-                },
-            },
-        }
-
-        response = test_client.post("/api/v1/tokenize", json=request_data)
-        assert response.status_code == 201
-        assert response.json()["card_type"] == "American Express"
-
-    def test_tokenize_invalid_card_number(self, test_client):
+    async def test_tokenize_invalid_card_number(self, test_client):
         """Test tokenization fails with invalid card number"""
         request_data = {
-            "card": {
-                "card_number": "1234",
-                "card_holder": "Invalid Card",
-                "expiry_month": 12,
-                "expiry_year": 2025,
-                "cvv": "123",
-            },
-            "customer": {
-                "email": "test@example.com",
-                "billing_address": {
-                    "street": "123 St",
-                    "city": "City",
-                    "state": "ST",
-                    "zip_code": "12345",
-                    "country": "US",
-                },
-            },
+            "card": {**_BASE_CARD, "card_number": "1234"},
+            "customer": _BASE_CUSTOMER,
         }
 
-        response = test_client.post("/api/v1/tokenize", json=request_data)
+        response = await test_client.post("/api/v1/tokenize", json=request_data)
         assert response.status_code == 422  # Validation error
 
-    def test_tokenize_generates_customer_id(self, test_client):
+    async def test_tokenize_generates_customer_id(self, test_client):
         """Test tokenization generates customer ID if not provided"""
-        request_data = {
-            "card": {
-                "card_number": "4532015112830366",
-                "card_holder": "John Doe",
-                "expiry_month": 12,
-                "expiry_year": 2025,
-                "cvv": "123",
-            },
-            "customer": {
-                "email": "john@example.com",
-                "billing_address": {
-                    "street": "123 St",
-                    "city": "City",
-                    "state": "ST",
-                    "zip_code": "12345",
-                    "country": "US",
-                },
-            },
-        }
-
-        response = test_client.post("/api/v1/tokenize", json=request_data)
+        response = await test_client.post(
+            "/api/v1/tokenize", content=_BASE_TOKENIZE_BODY, headers=_JSON_HEADERS
+        )
         assert response.status_code == 201
-        data = response.json()
+        data = _json(response)
         assert "customer_id" in data
         assert data["customer_id"].startswith("cust_")
 
@@ -216,34 +201,8 @@ class TestTokenization:
 class TestPaymentProcessing:
     """Test payment processing endpoint"""
 
-    def test_process_payment_success(self, test_client):
+    async def test_process_payment_success(self, test_client, token):
         """Test successful payment processing"""
-        # First tokenize a card
-        tokenize_request = {
-            "card": {
-                "card_number": "4532015112830366",
-                "card_holder": "John Doe",
-                "expiry_month": 12,
-                "expiry_year": 2025,
-                "cvv": "123",
-            },
-            "customer": {
-                "customer_id": "cust_123",
-                "email": "john@example.com",
-                "billing_address": {
-                    "street": "123 St",
-                    "city": "City",
-                    "state": "ST",
-                    "zip_code": "12345",
-                    "country": "US",
-                },
-            },
-        }
-
-        token_response = test_client.post("/api/v1/tokenize", json=tokenize_request)
-        token = token_response.json()["token"]
-
-        # Process payment
         payment_request = {
             "token": token,
             "amount": 99.99,
@@ -252,9 +211,9 @@ class TestPaymentProcessing:
             "description": "Test payment",
         }
 
-        response = test_client.post("/api/v1/payments", json=payment_request)
+        response = await test_client.post("/api/v1/payments", json=payment_request)
         assert response.status_code == 201
-        data = response.json()
+        data = _json(response)
 
         assert "transaction_id" in data
         assert data["transaction_id"].startswith("txn_")
@@ -265,166 +224,34 @@ class TestPaymentProcessing:
         assert "message" in data
         assert "processed_at" in data
 
-    def test_process_payment_insufficient_funds(self, test_client):
-        """Test payment with insufficient funds (special amount $0.01)"""
-        # Tokenize
-        tokenize_request = {
-            "card": {
-                "card_number": "4532015112830366",
-                "card_holder": "John Doe",
-                "expiry_month": 12,
-                "expiry_year": 2025,
-                "cvv": "123",
-            },
-            "customer": {
-                "email": "john@example.com",
-                "billing_address": {
-                    "street": "123 St",
-                    "city": "City",
-                    "state": "ST",
-                    "zip_code": "12345",
-                    "country": "US",
-                },
-            },
-        }
-
-        token_response = test_client.post("/api/v1/tokenize", json=tokenize_request)
-        token = token_response.json()["token"]
-
-        # Process payment with special amount
-        payment_request = {
-            "token": token,
-            "amount": 0.01,
-            "currency": "USD",
-            "customer_id": "cust_123",
-        }
-
-        response = test_client.post("/api/v1/payments", json=payment_request)
-        assert response.status_code == 201
-        data = response.json()
-        assert data["status"] == "failed"
-        assert data["message"] == "Insufficient funds"
-
-    def test_process_payment_card_declined(self, test_client):
-        """Test payment with declined card (special amount $0.02)"""
-        # Tokenize
-        tokenize_request = {
-            "card": {
-                "card_number": "4532015112830366",
-                "card_holder": "John Doe",
-                "expiry_month": 12,
-                "expiry_year": 2025,
-                "cvv": "123",
-            },
-            "customer": {
-                "email": "john@example.com",
-                "billing_address": {
-                    "street": "123 St",
-                    "city": "City",
-                    "state": "ST",
-                    "zip_code": "12345",
-                    "country": "US",
-                },
-            },
-        }
-
-        token_response = test_client.post("/api/v1/tokenize", json=tokenize_request)
-        token = token_response.json()["token"]
-
-        # Process payment with special amount
+    @pytest.mark.parametrize(
+        "amount,expected_status,expected_message",
+        [
+            (0.01, "failed", "Insufficient funds"),
+            (0.02, "failed", "Card declined"),
+            (0.03, "pending", None),
+            (15000.00, "pending", "manual review"),
+        ],
+    )
+    async def test_process_payment_special_amounts(
+        self, test_client, token, amount, expected_status, expected_message
+    ):
+        """Test the special amounts that force a deterministic outcome"""
         payment_request = {
             "token": token,
-            "amount": 0.02,
+            "amount": amount,
             "currency": "USD",
             "customer_id": "cust_123",
         }
 
-        response = test_client.post("/api/v1/payments", json=payment_request)
+        response = await test_client.post("/api/v1/payments", json=payment_request)
         assert response.status_code == 201
-        data = response.json()
-        assert data["status"] == "failed"
-        assert data["message"] == "Card declined"
-
-    def test_process_payment_pending(self, test_client):
-        """Test payment pending (special amount $0.03)"""
-        # Tokenize
-        tokenize_request = {
-            "card": {
-                "card_number": "4532015112830366",
-                "card_holder": "John Doe",
-                "expiry_month": 12,
-                "expiry_year": 2025,
-                "cvv": "123",
-            },
-            "customer": {
-                "email": "john@example.com",
-                "billing_address": {
-                    "street": "123 St",
-                    "city": "City",
-                    "state": "ST",
-                    "zip_code": "12345",
-                    "country": "US",
-                },
-            },
-        }
-
-        token_response = test_client.post("/api/v1/tokenize", json=tokenize_request)
-        token = token_response.json()["token"]
+        data = _json(response)
+        assert data["status"] == expected_status
+        if expected_message is not None:
+            assert expected_message.lower() in data["message"].lower()
 
-        # Process payment with special amount
-        payment_request = {
-            "token": token,
-            "amount": 0.03,
-            "currency": "USD",
-            "customer_id": "cust_123",
-        }
-
-        response = test_client.post("/api/v1/payments", json=payment_request)
-        assert response.status_code == 201
-        data = response.json()
-        assert data["status"] == "pending"
-
-    def test_process_payment_large_amount(self, test_client):
-        """Test payment with large amount requires review"""
-        # Tokenize
-        tokenize_request = {
-            "card": {
-                "card_number": "4532015112830366",
-                "card_holder": "John Doe",
-                "expiry_month": 12,
-                "expiry_year": 2025,
-                "cvv": "123",
-            },
-            "customer": {
-                "email": "john@example.com",
-                "billing_address": {
-                    "street": "123 St",
-                    "city": "City",
-                    "state": "ST",
-                    "zip_code": "12345",
-                    "country": "US",
-                },
-            },
-        }
-
-        token_response = test_client.post("/api/v1/tokenize", json=tokenize_request)
-        token = token_response.json()["token"]
-
-        # Process payment with large amount
-        payment_request = {
-            "token": token,
-            "amount": 15000.00,
-            "currency": "USD",
-            "customer_id": "cust_123",
-        }
-
-        response = test_client.post("/api/v1/payments", json=payment_request)
-        assert response.status_code == 201
-        data = response.json()
-        assert data["status"] == "pending"
-        assert "manual review" in data["message"].lower()
-
-    def test_process_payment_invalid_token(self, test_client):
+    async def test_process_payment_invalid_token(self, test_client):
         """Test payment fails with invalid token"""
         payment_request = {
             "token": "tok_invalid_token",
@@ -433,11 +260,11 @@ class TestPaymentProcessing:
             "customer_id": "cust_123",
         }
 
-        response = test_client.post("/api/v1/payments", json=payment_request)
+        response = await test_client.post("/api/v1/payments", json=payment_request)
         assert response.status_code == 401
-        assert "Invalid or expired token" in response.json()["detail"]
+        assert "Invalid or expired token" in _json(response)["detail"]
 
-    def test_process_payment_negative_amount(self, test_client):
+    async def test_process_payment_negative_amount(self, test_client):
         """Test payment fails with negative amount"""
         payment_request = {
             "token": "tok_some_token",
@@ -446,119 +273,94 @@ class TestPaymentProcessing:
             "customer_id": "cust_123",
         }
 
-        response = test_client.post("/api/v1/payments", json=payment_request)
+        response = await test_client.post("/api/v1/payments", json=payment_request)
         assert response.status_code == 422  # Validation error
 
 
-class TestTransactionRetrieval:
-    """Test transaction retrieval endpoints"""
+class TestTokenizeAndPay:
+    """Test combined tokenize-and-pay endpoint"""
 
-    def test_get_transaction_success(self, test_client):
-        """Test retrieving a transaction by ID"""
-        # Create a transaction first
-        tokenize_request = {
-            "card": {
-                "card_number": "4532015112830366",
-                "card_holder": "John Doe",
-                "expiry_month": 12,
-                "expiry_year": 2025,
-                "cvv": "123",
-            },
-            "customer": {
-                "customer_id": "cust_123",
-                "email": "john@example.com",
-                "billing_address": {
-                    "street": "123 St",
-                    "city": "City",
-                    "state": "ST",
-                    "zip_code": "12345",
-                    "country": "US",
-                },
-            },
+    async def test_tokenize_and_pay(self, test_client):
+        """Test tokenizing and charging a card in one call"""
+        request_data = {
+            "card": _BASE_CARD,
+            "customer": _CUSTOMER_123,
+            "amount": 0.01,
+            "currency": "USD",
+            "description": "Combined flow",
         }
 
-        token_response = test_client.post("/api/v1/tokenize", json=tokenize_request)
-        token = token_response.json()["token"]
+        response = await test_client.post("/api/v1/tokenize-and-pay", json=request_data)
+        assert response.status_code == 201
+        data = _json(response)
+
+        tokenization = data["tokenization"]
+        assert tokenization["token"].startswith("tok_")
+        assert tokenization["card_type"] == "Visa"
+        assert tokenization["customer_id"] == "cust_123"
+
+        payment = data["payment"]
+        assert payment["transaction_id"].startswith("txn_")
+        assert payment["token"] == tokenization["token"]
+        assert payment["amount"] == 0.01
+        # Special amount $0.01 deterministically fails
+        assert payment["status"] == "failed"
+        assert payment["message"] == "Insufficient funds"
 
-        payment_request = {
-            "token": token,
-            "amount": 99.99,
-            "currency": "USD",
-            "customer_id": "cust_123",
-        }
 
-        payment_response = test_client.post("/api/v1/payments", json=payment_request)
-        transaction_id = payment_response.json()["transaction_id"]
+class TestTransactionRetrieval:
+    """Test transaction retrieval endpoints"""
+
+    async def test_get_transaction_success(self, test_client, seeded_transaction):
+        """Test retrieving a transaction by ID"""
+        transaction_id = seeded_transaction["transaction_id"]
 
         # Get transaction
-        response = test_client.get(f"/api/v1/transactions/{transaction_id}")
+        response = await test_client.get(f"/api/v1/transactions/{transaction_id}")
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
 
         assert data["transaction_id"] == transaction_id
         assert data["amount"] == 99.99
         assert data["customer_id"] == "cust_123"
         assert "card_info" in data
 
-    def test_get_transaction_not_found(self, test_client):
+    async def test_get_transaction_not_found(self, test_client):
         """Test retrieving non-existent transaction"""
-        response = test_client.get("/api/v1/transactions/txn_nonexistent")
+        response = await test_client.get("/api/v1/transactions/txn_nonexistent")
         assert response.status_code == 404
-        assert "not found" in response.json()["detail"].lower()
+        assert "not found" in _json(response)["detail"].lower()
 
-    def test_get_customer_transactions(self, test_client):
+    async def test_get_customer_transactions(self, test_client, token):
         """Test retrieving all transactions for a customer"""
-        # Create multiple transactions
+        # Seed multiple transactions through the service layer
         customer_id = "cust_multi"
+        token_data = tokenizer.validate_token(token)
 
         for i in range(3):
-            tokenize_request = {
-                "card": {
-                    "card_number": "4532015112830366",
-                    "card_holder": "John Doe",
-                    "expiry_month": 12,
-                    "expiry_year": 2025,
-                    "cvv": "123",
-                },
-                "customer": {
-                    "customer_id": customer_id,
-                    "email": "john@example.com",
-                    "billing_address": {
-                        "street": "123 St",
-                        "city": "City",
-                        "state": "ST",
-                        "zip_code": "12345",
-                        "country": "US",
-                    },
-                },
-            }
-
-            token_response = test_client.post("/api/v1/tokenize", json=tokenize_request)
-            token = token_response.json()["token"]
-
-            payment_request = {
-                "token": token,
-                "amount": 10.00 * (i + 1),
-                "currency": "USD",
-                "customer_id": customer_id,
-            }
-
-            test_client.post("/api/v1/payments", json=payment_request)
+            processor.process_payment(
+                token=token,
+                amount=10.00 * (i + 1),
+                currency="USD",
+                customer_id=customer_id,
+                description=None,
+                token_data=token_data,
+            )
 
         # Get customer transactions
-        response = test_client.get(f"/api/v1/customers/{customer_id}/transactions")
+        response = await test_client.get(f"/api/v1/customers/{customer_id}/transactions")
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
 
         assert data["customer_id"] == customer_id
         assert data["transaction_count"] == 3
         assert len(data["transactions"]) == 3
 
-    def test_get_customer_transactions_empty(self, test_client):
+    async def test_get_customer_transactions_empty(self, test_client):
         """Test retrieving transactions for customer with no transactions"""
-        response = test_client.get("/api/v1/customers/cust_empty/transactions")
+        response = await test_client.get("/api/v1/customers/cust_empty/transactions")
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
 
         assert data["customer_id"] == "cust_empty"
         assert data["transaction_count"] == 0
@@ -568,106 +370,48 @@ class TestTransactionRetrieval:
 class TestRefunds:
     """Test refund endpoint"""
 
-    def test_refund_successful_transaction(self, test_client):
+    async def test_refund_successful_transaction(self, test_client, token, monkeypatch):
         """Test refunding a successful transaction"""
-        # Create a successful transaction (using special amount to ensure success)
-        tokenize_request = {
-            "card": {
-                "card_number": "4532015112830366",
-                "card_holder": "John Doe",
-                "expiry_month": 12,
-                "expiry_year": 2025,
-                "cvv": "123",
-            },
-            "customer": {
-                "customer_id": "cust_123",
-                "email": "john@example.com",
-                "billing_address": {
-                    "street": "123 St",
-                    "city": "City",
-                    "state": "ST",
-                    "zip_code": "12345",
-                    "country": "US",
-                },
-            },
-        }
+        # Pin the processor's RNG so the payment succeeds first try
+        # instead of retrying up to 10 tokenize+pay roundtrips
+        monkeypatch.setattr(processor, "_rand", lambda: 0.0)
 
-        token_response = test_client.post("/api/v1/tokenize", json=tokenize_request)
-        token = token_response.json()["token"]
-
-        # Try to create a successful payment (may need multiple attempts due to randomness)
-        transaction_id = None
-        for _ in range(10):
-            payment_request = {
-                "token": token,
-                "amount": 99.99,
-                "currency": "USD",
-                "customer_id": "cust_123",
-            }
-
-            payment_response = test_client.post(
-                "/api/v1/payments", json=payment_request
-            )
-            if payment_response.json()["status"] == "success":
-                transaction_id = payment_response.json()["transaction_id"]
-                break
-
-            # Re-tokenize for next attempt
-            token_response = test_client.post("/api/v1/tokenize", json=tokenize_request)
-            token = token_response.json()["token"]
+        payment_request = {
+            "token": token,
+            "amount": 99.99,
+            "currency": "USD",
+            "customer_id": "cust_123",
+        }
 
-        # Skip test if we couldn't create a successful transaction
-        if transaction_id is None:
-            pytest.skip("Could not create successful transaction")
+        payment_response = await test_client.post(
+            "/api/v1/payments", json=payment_request
+        )
+        assert _json(payment_response)["status"] == "success"
+        transaction_id = _json(payment_response)["transaction_id"]
 
         # Refund the transaction
-        response = test_client.post(f"/api/v1/transactions/{transaction_id}/refund")
+        response = await test_client.post(f"/api/v1/transactions/{transaction_id}/refund")
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
 
         assert "refund_id" in data
         assert data["original_transaction_id"] == transaction_id
         assert data["status"] == "success"
 
-    def test_refund_nonexistent_transaction(self, test_client):
+    async def test_refund_nonexistent_transaction(self, test_client):
         """Test refunding non-existent transaction"""
-        response = test_client.post("/api/v1/transactions/txn_nonexistent/refund")
+        response = await test_client.post("/api/v1/transactions/txn_nonexistent/refund")
         assert response.status_code == 404
 
 
 class TestTokenInfo:
     """Test token information endpoint"""
 
-    def test_get_token_info(self, test_client):
+    async def test_get_token_info(self, test_client, token):
         """Test retrieving token information"""
-        # Create a token
-        tokenize_request = {
-            "card": {
-                "card_number": "4532015112830366",
-                "card_holder": "John Doe",
-                "expiry_month": 12,
-                "expiry_year": 2025,
-                "cvv": "123",
-            },
-            "customer": {
-                "email": "john@example.com",
-                "billing_address": {
-                    "street": "123 St",
-                    "city": "City",
-                    "state": "ST",
-                    "zip_code": "12345",
-                    "country": "US",
-                },
-            },
-        }
-
-        token_response = test_client.post("/api/v1/tokenize", json=tokenize_request)
-        token = token_response.json()["token"]
-
-        # Get token info
-        response = test_client.get(f"/api/v1/tokens/{token}")
+        response = await test_client.get(f"/api/v1/tokens/{token}")
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
 
         assert data["token"] == token
         assert data["last_four_digits"] == "0366"
@@ -680,11 +424,11 @@ class TestTokenInfo:
         assert "card_number_hash" not in data
         assert "card_holder" not in data
 
-    def test_get_token_info_not_found(self, test_client):
+    async def test_get_token_info_not_found(self, test_client):
         """Test retrieving info for non-existent token"""
-        response = test_client.get("/api/v1/tokens/tok_nonexistent")
+        response = await test_client.get("/api/v1/tokens/tok_nonexistent")
         assert response.status_code == 404
-        assert "not found" in response.json()["detail"].lower()
+        assert "not found" in _json(response)["detail"].lower()
 
 
 if __name__ == "__main__":
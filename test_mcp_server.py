@@ -5,34 +5,51 @@ This script tests the MCP server functionality without requiring
 external AI frameworks.
 """
 
-from mcp_server import get_payment_tools, execute_payment_function
-import json
+import asyncio
+import sys
 
+import orjson
 
-def print_section(title):
-    """Print a formatted section header."""
-    print(f"\n{'='*70}")
-    print(f"  {title}")
-    print("=" * 70)
+from mcp_server import get_payment_tools, execute_payment_function_native
+
+
+class Reporter:
+    """Buffer one test's output and emit it in a single write.
+
+    Collapses the dozens of per-line print/flush calls into one write
+    per test, and keeps the concurrently running tests from interleaving
+    their lines.
+    """
+
+    def __init__(self, title):
+        self.buf = [f"\n{'='*70}", f"  {title}", "=" * 70]
+
+    def line(self, text=""):
+        self.buf.append(text)
+
+    def flush(self):
+        sys.stdout.write("\n".join(self.buf) + "\n")
+        self.buf.clear()
 
 
 def test_get_tools():
     """Test getting the list of available tools."""
-    print_section("Test 1: Get Payment Tools")
+    r = Reporter("Test 1: Get Payment Tools")
 
     tools = get_payment_tools()
-    print(f"\n✓ Found {len(tools)} tools")
+    r.line(f"\n✓ Found {len(tools)} tools")
 
     for i, tool in enumerate(tools, 1):
-        print(f"\n{i}. {tool['function']['name']}")
-        print(f"   Description: {tool['function']['description'][:80]}...")
+        r.line(f"\n{i}. {tool['function']['name']}")
+        r.line(f"   Description: {tool['function']['description'][:80]}...")
 
+    r.flush()
     return tools
 
 
-def test_tokenize_card():
+async def test_tokenize_card():
     """Test card tokenization."""
-    print_section("Test 2: Tokenize a Payment Card")
+    r = Reporter("Test 2: Tokenize a Payment Card")
 
     args = {
         "card_number": "4532015112830366",
@@ -48,20 +65,21 @@ def test_tokenize_card():
         "billing_country": "US",
     }
 
-    print("\n📝 Tokenizing Visa card...")
-    result = execute_payment_function("tokenize_payment_card", json.dumps(args))
-    result_data = json.loads(result)
+    r.line("\n📝 Tokenizing Visa card...")
+    result = await execute_payment_function_native("tokenize_payment_card", args)
+    result_data = orjson.loads(result)
 
-    print(f"\n✓ Token: {result_data.get('token')}")
-    print(f"✓ Card Type: {result_data.get('card_type')}")
-    print(f"✓ Last 4 Digits: {result_data.get('last_four_digits')}")
+    r.line(f"\n✓ Token: {result_data.get('token')}")
+    r.line(f"✓ Card Type: {result_data.get('card_type')}")
+    r.line(f"✓ Last 4 Digits: {result_data.get('last_four_digits')}")
 
+    r.flush()
     return result_data.get("token")
 
 
-def test_process_payment(token):
+async def test_process_payment(token):
     """Test payment processing."""
-    print_section("Test 3: Process a Payment")
+    r = Reporter("Test 3: Process a Payment")
 
     args = {
         "token": token,
@@ -71,67 +89,71 @@ def test_process_payment(token):
         "description": "Test payment from MCP server",
     }
 
-    print(f"\n💳 Processing payment of ${args['amount']}...")
-    result = execute_payment_function("process_payment", json.dumps(args))
-    result_data = json.loads(result)
+    r.line(f"\n💳 Processing payment of ${args['amount']}...")
+    result = await execute_payment_function_native("process_payment", args)
+    result_data = orjson.loads(result)
 
-    print(f"\n✓ Transaction ID: {result_data.get('transaction_id')}")
-    print(f"✓ Status: {result_data.get('status')}")
-    print(f"✓ Message: {result_data.get('message')}")
+    r.line(f"\n✓ Transaction ID: {result_data.get('transaction_id')}")
+    r.line(f"✓ Status: {result_data.get('status')}")
+    r.line(f"✓ Message: {result_data.get('message')}")
 
+    r.flush()
     return result_data.get("transaction_id")
 
 
-def test_get_transaction(transaction_id):
+async def test_get_transaction(transaction_id):
     """Test getting transaction details."""
-    print_section("Test 4: Get Transaction Details")
+    r = Reporter("Test 4: Get Transaction Details")
 
     args = {"transaction_id": transaction_id}
 
-    print(f"\n🔍 Retrieving transaction {transaction_id}...")
-    result = execute_payment_function("get_transaction", json.dumps(args))
-    result_data = json.loads(result)
+    r.line(f"\n🔍 Retrieving transaction {transaction_id}...")
+    result = await execute_payment_function_native("get_transaction", args)
+    result_data = orjson.loads(result)
 
-    print(f"\n✓ Amount: ${result_data.get('amount')}")
-    print(f"✓ Status: {result_data.get('status')}")
-    print(f"✓ Customer ID: {result_data.get('customer_id')}")
+    r.line(f"\n✓ Amount: ${result_data.get('amount')}")
+    r.line(f"✓ Status: {result_data.get('status')}")
+    r.line(f"✓ Customer ID: {result_data.get('customer_id')}")
 
+    r.flush()
     return result_data
 
 
-def test_get_customer_transactions():
+async def test_get_customer_transactions():
     """Test getting customer transactions."""
-    print_section("Test 5: Get Customer Transactions")
+    r = Reporter("Test 5: Get Customer Transactions")
 
     args = {"customer_id": "cust_test"}
 
-    print("\n📊 Retrieving customer transactions...")
-    result = execute_payment_function("get_customer_transactions", json.dumps(args))
-    result_data = json.loads(result)
+    r.line("\n📊 Retrieving customer transactions...")
+    result = await execute_payment_function_native("get_customer_transactions", args)
+    result_data = orjson.loads(result)
 
-    print(f"\n✓ Customer ID: {result_data.get('customer_id')}")
-    print(f"✓ Transaction Count: {result_data.get('transaction_count')}")
+    r.line(f"\n✓ Customer ID: {result_data.get('customer_id')}")
+    r.line(f"✓ Transaction Count: {result_data.get('transaction_count')}")
+    r.flush()
 
 
-def test_get_token_info(token):
+async def test_get_token_info(token):
     """Test getting token information."""
-    print_section("Test 6: Get Token Information")
+    r = Reporter("Test 6: Get Token Information")
 
     args = {"token": token}
 
-    print(f"\n🔐 Getting token information...")
-    result = execute_payment_function("get_token_info", json.dumps(args))
-    result_data = json.loads(result)
+    r.line(f"\n🔐 Getting token information...")
+    result = await execute_payment_function_native("get_token_info", args)
+    result_data = orjson.loads(result)
 
-    print(f"\n✓ Token: {result_data.get('token')[:20]}...")
-    print(f"✓ Card Type: {result_data.get('card_type')}")
-    print(f"✓ Is Valid: {result_data.get('is_valid')}")
-    print(f"✓ Expires At: {result_data.get('expires_at')}")
+    r.line(f"\n✓ Token: {result_data.get('token')[:20]}...")
+    r.line(f"✓ Card Type: {result_data.get('card_type')}")
+    r.line(f"✓ Is Valid: {result_data.get('is_valid')}")
+    r.line(f"✓ Expires At: {result_data.get('expires_at')}")
+    r.flush()
 
 
-def test_insufficient_funds():
+async def test_insufficient_funds():
     """Test insufficient funds scenario."""
-    print_section("Test 7: Test Insufficient Funds Scenario")
+    r = Reporter("Test 7: Test Insufficient Funds Scenario")
 
     # First tokenize a new card
     args = {
@@ -148,9 +170,9 @@ def test_insufficient_funds():
         "billing_country": "US",
     }
 
-    print("\n📝 Tokenizing Mastercard...")
-    result = execute_payment_function("tokenize_payment_card", json.dumps(args))
-    token = json.loads(result).get("token")
+    r.line("\n📝 Tokenizing Mastercard...")
+    result = await execute_payment_function_native("tokenize_payment_card", args)
+    token = orjson.loads(result).get("token")
 
     # Process payment with special amount $0.01
     payment_args = {
@@ -161,33 +183,35 @@ def test_insufficient_funds():
         "description": "Insufficient funds test",
     }
 
-    print("💳 Processing payment of $0.01 (should fail)...")
-    result = execute_payment_function("process_payment", json.dumps(payment_args))
-    result_data = json.loads(result)
+    r.line("💳 Processing payment of $0.01 (should fail)...")
+    result = await execute_payment_function_native("process_payment", payment_args)
+    result_data = orjson.loads(result)
 
-    print(f"\n✓ Status: {result_data.get('status')}")
-    print(f"✓ Message: {result_data.get('message')}")
+    r.line(f"\n✓ Status: {result_data.get('status')}")
+    r.line(f"✓ Message: {result_data.get('message')}")
+    r.flush()
 
 
-def test_refund(transaction_id):
+async def test_refund(transaction_id):
     """Test refunding a transaction."""
-    print_section("Test 8: Refund a Transaction")
+    r = Reporter("Test 8: Refund a Transaction")
 
     args = {"transaction_id": transaction_id}
 
-    print(f"\n💰 Refunding transaction {transaction_id}...")
-    result = execute_payment_function("refund_transaction", json.dumps(args))
-    result_data = json.loads(result)
+    r.line(f"\n💰 Refunding transaction {transaction_id}...")
+    result = await execute_payment_function_native("refund_transaction", args)
+    result_data = orjson.loads(result)
 
     if result_data.get("refund_id"):
-        print(f"\n✓ Refund ID: {result_data.get('refund_id')}")
-        print(f"✓ Status: {result_data.get('status')}")
-        print(f"✓ Message: {result_data.get('message')}")
+        r.line(f"\n✓ Refund ID: {result_data.get('refund_id')}")
+        r.line(f"✓ Status: {result_data.get('status')}")
+        r.line(f"✓ Message: {result_data.get('message')}")
     else:
-        print(f"\n⚠ Could not refund: {result_data.get('message', 'Unknown error')}")
+        r.line(f"\n⚠ Could not refund: {result_data.get('message', 'Unknown error')}")
+    r.flush()
 
 
-def main():
+async def main():
     """Run all MCP server tests."""
     print("\n" + "=" * 70)
     print("  Payment MCP Server - Comprehensive Test Suite")
@@ -199,28 +223,26 @@ def main():
         tools = test_get_tools()
 
         # Test 2: Tokenize a card
-        token = test_tokenize_card()
+        token = await test_tokenize_card()
 
         # Test 3: Process a payment
-        transaction_id = test_process_payment(token)
-
-        # Test 4: Get transaction details
-        test_get_transaction(transaction_id)
-
-        # Test 5: Get customer transactions
-        test_get_customer_transactions()
-
-        # Test 6: Get token info
-        test_get_token_info(token)
+        transaction_id = await test_process_payment(token)
 
-        # Test 7: Test insufficient funds
-        test_insufficient_funds()
+        # Tests 4-7 only depend on the transaction/token above (test 7 on
+        # neither), so they run concurrently over the shared client pool
+        await asyncio.gather(
+            test_get_transaction(transaction_id),
+            test_get_customer_transactions(),
+            test_get_token_info(token),
+            test_insufficient_funds(),
+        )
 
-        # Test 8: Refund transaction (if successful)
-        test_refund(transaction_id)
+        # Test 8: Refund transaction (if successful) — last, so the reads
+        # above observe the pre-refund state
+        await test_refund(transaction_id)
 
         # Summary
-        print_section("Test Summary")
+        print(f"\n{'='*70}\n  Test Summary\n" + "=" * 70)
         print("\n✅ All MCP server tests completed successfully!")
         print("\nThe Payment MCP Server is working correctly and can be used with:")
         print("  • Microsoft Agent Framework")
@@ -239,4 +261,4 @@ def main():
 
 
 if __name__ == "__main__":
-    exit(main())
+    exit(asyncio.run(main()))
@@ -6,22 +6,61 @@ This script tests the stdio-based MCP server by sending JSON-RPC requests
 and validating responses.
 """
 
+import os
 import subprocess
-import json
+import threading
 import time
 
+import orjson
+
+
+def wait_ready(process, timeout=2.0):
+    """Probe the server with an initialize request until it answers.
+
+    Replaces a fixed one-second startup sleep; the server is normally up
+    in well under 100ms. The blocking readline happens in a worker
+    thread with a bounded join — select() on a pipe only works on Unix,
+    and this harness also runs on Windows.
+    """
+    probe = {"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {}}
+    process.stdin.write(orjson.dumps(probe) + b"\n")
+    process.stdin.flush()
+
+    result = []
+    reader = threading.Thread(
+        target=lambda: result.append(process.stdout.readline()), daemon=True
+    )
+    reader.start()
+    reader.join(timeout)
+    return bool(result) and result[0].strip() != b""
+
 
 def send_request(process, request):
-    """Send a JSON-RPC request to the MCP server."""
-    request_str = json.dumps(request) + "\n"
-    process.stdin.write(request_str.encode())
+    """Send a single JSON-RPC request and wait for its response."""
+    return send_batch(process, [request])[0]
+
+
+def send_batch(process, requests):
+    """Send several JSON-RPC requests in one write, then collect replies.
+
+    The server handles one newline-delimited frame per request and may
+    answer out of order (each request runs as its own task), so responses
+    are matched back to requests by id. One write + one flush for the
+    whole batch instead of a roundtrip per call.
+    """
+    payload = b"".join(orjson.dumps(request) + b"\n" for request in requests)
+    process.stdin.write(payload)
     process.stdin.flush()
 
-    # Read response
-    response_line = process.stdout.readline().decode().strip()
-    if response_line:
-        return json.loads(response_line)
-    return None
+    by_id = {}
+    for _ in requests:
+        response_line = process.stdout.readline().strip()
+        if not response_line:
+            break
+        response = orjson.loads(response_line)
+        by_id[response.get("id")] = response
+
+    return [by_id.get(request["id"]) for request in requests]
 
 
 def test_mcp_server():
@@ -37,65 +76,77 @@ def test_mcp_server():
         stdin=subprocess.PIPE,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
-        cwd="C:\\Dev\\checkoutMCP",
+        cwd=os.path.dirname(os.path.abspath(__file__)),
     )
 
-    time.sleep(1)  # Give server time to start
+    if not wait_ready(process):
+        print("⚠ Server did not answer the readiness probe")
 
     try:
+        # All four checks are independent — ship them as one batch
+        requests = [
+            {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}},
+            {"jsonrpc": "2.0", "id": 2, "method": "tools/list", "params": {}},
+            {
+                "jsonrpc": "2.0",
+                "id": 3,
+                "method": "tools/call",
+                "params": {
+                    "name": "tokenize_payment_card",
+                    "arguments": {
+                        "card_number": "4532015112830366",
+                        "card_holder": "John Doe",
+                        "expiry_month": 12,
+                        "expiry_year": 2025,
+                        "cvv": "123",
+                        "customer_email": "test@example.com",
+                        "billing_street": "123 Main St",
+                        "billing_city": "New York",
+                        "billing_state": "NY",
+                        "billing_zip": "10001",
+                    },
+                },
+            },
+            {"jsonrpc": "2.0", "id": 4, "method": "get_health", "params": {}},
+        ]
+
+        init_resp, tools_resp, tokenize_resp, health_resp = send_batch(
+            process, requests
+        )
+
         # Test 1: Initialize
         print("\n[Test 1] Initialize")
         print("-" * 70)
-        request = {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}}
-        response = send_request(process, request)
-        print(f"✓ Response: {json.dumps(response, indent=2)}")
+        print(f"✓ Response: {orjson.dumps(init_resp, option=orjson.OPT_INDENT_2).decode()}")
 
         # Test 2: List tools
         print("\n[Test 2] List Tools")
         print("-" * 70)
-        request = {"jsonrpc": "2.0", "id": 2, "method": "tools/list", "params": {}}
-        response = send_request(process, request)
-        if response and "result" in response:
-            tools = response["result"].get("tools", [])
+        if tools_resp and "result" in tools_resp:
+            tools = tools_resp["result"].get("tools", [])
             print(f"✓ Found {len(tools)} tools:")
             for tool in tools:
                 print(f"  - {tool['name']}")
         else:
-            print(f"✗ Response: {response}")
+            print(f"✗ Response: {tools_resp}")
 
         # Test 3: Call tokenize tool
         print("\n[Test 3] Call Tokenize Tool")
         print("-" * 70)
-        request = {
-            "jsonrpc": "2.0",
-            "id": 3,
-            "method": "tools/call",
-            "params": {
-                "name": "tokenize_payment_card",
-                "arguments": {
-                    "card_number": "4532015112830366",
-                    "card_holder": "John Doe",
-                    "expiry_month": 12,
-                    "expiry_year": 2025,
-                    "cvv": "123",
-                    "customer_email": "test@example.com",
-                    "billing_street": "123 Main St",
-                    "billing_city": "New York",
-                    "billing_state": "NY",
-                    "billing_zip": "10001",
-                },
-            },
-        }
-        response = send_request(process, request)
-        if response and "result" in response:
-            content = response["result"].get("content", [])
+        if tokenize_resp and "result" in tokenize_resp:
+            content = tokenize_resp["result"].get("content", [])
             if content:
                 result_text = content[0].get("text", "")
-                result_data = json.loads(result_text)
+                result_data = orjson.loads(result_text)
                 print(f"✓ Token: {result_data.get('token', 'N/A')}")
                 print(f"✓ Card Type: {result_data.get('card_type', 'N/A')}")
         else:
-            print(f"✗ Response: {response}")
+            print(f"✗ Response: {tokenize_resp}")
+
+        # Test 4: Health Check
+        print("\n[Test 4] Health Check")
+        print("-" * 70)
+        print(f"✓ Response: {orjson.dumps(health_resp, option=orjson.OPT_INDENT_2).decode()}")
 
         print("\n" + "=" * 70)
         print("✅ MCP Server Tests Completed!")
@@ -106,13 +157,6 @@ def test_mcp_server():
         print("  • Microsoft Copilot Studio")
         print("\nSee MCP_CONFIGURATION.md for setup instructions.")
 
-        # Test 4: Health Check
-        print("\n[Test 4] Health Check")
-        print("-" * 70)
-        request = {"jsonrpc": "2.0", "id": 4, "method": "get_health", "params": {}}
-        response = send_request(process, request)
-        print(f"✓ Response: {json.dumps(response, indent=2)}")
-
     finally:
         # Cleanup
         process.terminate()
@@ -0,0 +1,62 @@
+"""Tests for the PaymentAgent tool-result cache.
+
+Covers the read-through cache in _execute_tool and the invalidation a
+write triggers, without touching the network: the agent is built bare
+and its HTTP client answers from an in-process mock transport.
+"""
+
+import threading
+
+import httpx
+import orjson
+import pytest
+from cachetools import TTLCache
+
+from payment_agent import PaymentAgent
+
+
+@pytest.fixture
+def agent():
+    """A PaymentAgent wired to a canned MCP API, skipping real startup."""
+
+    def handler(request):
+        call = orjson.loads(request.content)
+        text = orjson.dumps({"echo": call["name"]}).decode()
+        return httpx.Response(
+            200, json={"content": [{"type": "text", "text": text}]}
+        )
+
+    agent = PaymentAgent.__new__(PaymentAgent)
+    agent._tool_cache = TTLCache(maxsize=1024, ttl=30)
+    agent._tool_cache_lock = threading.Lock()
+    agent.http_client = httpx.Client(
+        transport=httpx.MockTransport(handler), base_url="http://mcp"
+    )
+    yield agent
+    agent.http_client.close()
+
+
+def test_read_result_is_cached(agent):
+    first = agent._execute_tool("get_transaction", {"transaction_id": "txn_1"})
+    assert first == agent._execute_tool(
+        "get_transaction", {"transaction_id": "txn_1"}
+    )
+    assert len(agent._tool_cache) == 1
+
+
+def test_write_invalidates_cached_read(agent):
+    agent._execute_tool("get_transaction", {"transaction_id": "txn_1"})
+    assert len(agent._tool_cache) == 1
+
+    agent._execute_tool("refund_transaction", {"transaction_id": "txn_1"})
+    assert len(agent._tool_cache) == 0
+
+
+def test_write_keeps_unrelated_cached_reads(agent):
+    agent._execute_tool("get_transaction", {"transaction_id": "txn_1"})
+    agent._execute_tool("get_transaction", {"transaction_id": "txn_2"})
+
+    agent._execute_tool("refund_transaction", {"transaction_id": "txn_1"})
+    assert [key[1] for key in agent._tool_cache] == [
+        orjson.dumps({"transaction_id": "txn_2"}, option=orjson.OPT_SORT_KEYS)
+    ]